@@ -5,12 +5,19 @@ Configuration Module
 ==============================================
 """
 
-from functools import lru_cache
-from pydantic_settings import BaseSettings
+from functools import cached_property, lru_cache
+from pathlib import Path
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 from typing import Optional
 
 
+__all__ = ["settings", "get_settings"]
+
+# 專案根目錄（相對路徑設定以此為基準）
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
 class Settings(BaseSettings):
     """
     應用程式設定
@@ -72,6 +79,10 @@ class Settings(BaseSettings):
         default=False,
         description="除錯模式"
     )
+    cors_allow_origins: str = Field(
+        default="*",
+        description="允許跨域存取的來源（逗號分隔，* 表示全部）"
+    )
     template_dir: str = Field(
         default="templates",
         description="Word 模板資料夾路徑"
@@ -80,10 +91,18 @@ class Settings(BaseSettings):
         default="/tmp/reports",
         description="暫存檔案資料夾"
     )
+    use_tmpfs: bool = Field(
+        default=False,
+        description="上傳 PDF 與產出 Word 等中間檔案改放在 /dev/shm（僅在可寫入時生效）"
+    )
     max_pdf_size_mb: int = Field(
         default=50,
         description="最大允許的 PDF 檔案大小 (MB)"
     )
+    report_cache_max_mb: int = Field(
+        default=500,
+        description="報告快取的磁碟用量上限 (MB)，設為 0 停用快取"
+    )
 
     # ==============================================
     # LLM 相關設定
@@ -104,6 +123,14 @@ class Settings(BaseSettings):
         default=10,
         description="LLM 並發呼叫數量（避免 API rate limit）"
     )
+    llm_max_reports: int = Field(
+        default=4,
+        description="同時進行 AI 萃取的報告數量上限（每個 worker）"
+    )
+    llm_queue_max: int = Field(
+        default=16,
+        description="等待 AI 萃取的報告數量上限，超過時回傳 503"
+    )
 
     # ==============================================
     # 實驗室固定資訊
@@ -141,10 +168,25 @@ class Settings(BaseSettings):
         description="預設 CNS 標準版本"
     )
 
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
-        case_sensitive = False  # 環境變數名稱不區分大小寫
+    # ==============================================
+    # 衍生路徑（首次存取時解析一次）
+    # ==============================================
+    @cached_property
+    def template_path(self) -> Path:
+        """Word 模板資料夾的絕對路徑"""
+        return PROJECT_ROOT / self.template_dir
+
+    @cached_property
+    def temp_path(self) -> Path:
+        """暫存檔案資料夾路徑"""
+        return Path(self.temp_dir)
+
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        case_sensitive=False,  # 環境變數名稱不區分大小寫
+        frozen=True,  # 設定於啟動後不可變更，避免意外修改全域 singleton
+    )
 
 
 @lru_cache()
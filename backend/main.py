@@ -12,35 +12,65 @@ Endpoints:
 """
 
 import os
+import re
+import logging
+import gzip
+import hashlib
+import secrets
+import shutil
 import uuid
 import tempfile
 import time
-from datetime import datetime
-from typing import Optional
+import zipfile
+from typing import Dict, List, Optional, Tuple
 from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from pathlib import Path
 
-from fastapi import FastAPI, File, UploadFile, HTTPException, Form, BackgroundTasks
-from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, StreamingResponse
+from fastapi import FastAPI, File, UploadFile, HTTPException, Form, BackgroundTasks, Request
+from fastapi.responses import FileResponse, HTMLResponse, ORJSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.background import BackgroundTask
+import aiofiles
+import anyio
+import brotli
+import orjson
 import asyncio
-import json
-import base64
-
-# 確保可以 import backend 內的模組
-import sys
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-
-from config import settings
-from utils.logger import get_logger, setup_logging
-from services.adobe_extract import extract_pdf_to_json as adobe_extract_pdf, AdobeExtractError
-from services.pymupdf_extract import extract_pdf_to_json as pymupdf_extract_pdf, PyMuPDFExtractError
-from services.azure_llm import extract_report_schema_from_adobe_json, create_mock_schema
-from services.word_filler import fill_cns_template
+from urllib.parse import quote
+
+from .config import settings
+from .utils.logger import get_logger, setup_logging
+from .services.adobe_extract import (
+    extract_pdf_to_json as adobe_extract_pdf,
+    AdobeExtractError,
+    create_adobe_client,
+)
+from .services.pymupdf_extract import extract_pdf_to_json as pymupdf_extract_pdf, PyMuPDFExtractError
+from .services.azure_llm import extract_report_schema_from_adobe_json, create_azure_client, create_mock_schema
+from .services.word_filler import fill_cns_template, load_template_document
+from .services import report_cache
 
 # 設定 logging
 setup_logging()
 logger = get_logger(__name__)
 
+# 日誌分隔線
+_BANNER = "=" * 50
+
+# 程序啟動時間（用於健康檢查的 uptime）
+START_NS = time.monotonic_ns()
+
+# tmpfs 暫存目錄（USE_TMPFS 啟用且 /dev/shm 可寫入時使用）
+TMPFS_TEMP_DIR = "/dev/shm/cb2cns"
+USE_TMPFS = settings.use_tmpfs and os.access("/dev/shm", os.W_OK)
+
+# 常用設定值（settings 不可變，於載入時計算一次即可）
+TEMP_DIR = TMPFS_TEMP_DIR if USE_TMPFS else str(settings.temp_path)
+MAX_PDF_BYTES = settings.max_pdf_size_mb * 1024 * 1024
+TEMPLATE_DIR = str(settings.template_path)
+
 
 # ==============================================
 # Lifespan Management
@@ -52,23 +82,60 @@ async def lifespan(app: FastAPI):
     應用程式生命週期管理
     """
     # Startup
-    logger.info("=" * 50)
-    logger.info(f"啟動 {settings.app_name}")
-    logger.info("=" * 50)
+    logger.info(_BANNER)
+    logger.info("啟動 %s", settings.app_name)
+    logger.info(_BANNER)
 
     # 確保暫存目錄存在
-    os.makedirs(settings.temp_dir, exist_ok=True)
-    logger.info(f"暫存目錄: {settings.temp_dir}")
+    os.makedirs(TEMP_DIR, exist_ok=True)
+    logger.info("暫存目錄: %s", TEMP_DIR)
 
     # 確保模板目錄存在
-    template_dir = os.path.join(os.path.dirname(__file__), "..", settings.template_dir)
-    if not os.path.exists(template_dir):
-        os.makedirs(template_dir, exist_ok=True)
-        logger.warning(f"模板目錄不存在，已建立: {template_dir}")
+    if not os.path.isdir(TEMPLATE_DIR):
+        Path(TEMPLATE_DIR).mkdir(parents=True, exist_ok=True)
+        logger.warning("模板目錄不存在，已建立: %s", TEMPLATE_DIR)
+
+    # 模板目錄（載入時已解析為實際絕對路徑）存入 app.state，請求處理時直接讀取
+    app.state.template_dir = TEMPLATE_DIR
+
+    # 預先解析 Word 模板，第一個請求不必等待解析
+    template_path = _resolve_template(TEMPLATE_DIR)
+    if template_path:
+        try:
+            await asyncio.to_thread(load_template_document, template_path)
+        except Exception as e:
+            logger.warning("預先載入模板失敗: %s", e)
+
+    # PyMuPDF 擷取用的行程池（CPU 密集，避開 GIL 讓多份 PDF 平行解析）
+    app.state.pdf_executor = ProcessPoolExecutor(max_workers=os.cpu_count() or 1)
+
+    # Word 模板填寫為 CPU 密集工作（受 GIL 限制），限制同時填寫的數量避免執行緒互相搶占；
+    # LLM 呼叫為非同步 I/O（AsyncAzureOpenAI），不佔用執行緒，不受此限制
+    app.state.fill_limiter = anyio.CapacityLimiter(max(1, (os.cpu_count() or 1) - 1))
+
+    # 同時進行 AI 萃取的報告數量上限：避免突發流量時大量請求同時呼叫 LLM API 而觸發 rate limit
+    app.state.llm_limiter = anyio.CapacityLimiter(settings.llm_max_reports)
+
+    # Adobe API 共用的 HTTP client（重複使用 keep-alive 連線）
+    app.state.adobe_client = create_adobe_client()
+
+    # Azure OpenAI 共用 client（所有請求的 LLM 呼叫共用連線池，省去每次 TLS 交握）
+    app.state.llm = create_azure_client()
+
+    # 定期清理暫存目錄中遺留的舊檔案（例如處理中斷而未刪除的檔案）
+    gc_task = asyncio.create_task(_temp_gc_loop())
 
     yield
 
     # Shutdown
+    gc_task.cancel()
+    try:
+        await gc_task
+    except asyncio.CancelledError:
+        pass
+    await app.state.adobe_client.aclose()
+    await app.state.llm.close()
+    app.state.pdf_executor.shutdown(wait=False, cancel_futures=True)
     logger.info("應用程式關閉")
 
 
@@ -80,423 +147,402 @@ app = FastAPI(
     title=settings.app_name,
     description="將 CB Test Report PDF 轉換為 CNS Report Word 文件",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    # dict 回應（/health、/api/template-info 等）以 orjson 序列化
+    default_response_class=ORJSONResponse
 )
 
 # CORS 設定（允許前端跨域存取）
+# 來源清單由 CORS_ALLOW_ORIGINS 設定；萬用字元不可搭配 credentials（瀏覽器會拒絕）
+CORS_ORIGINS = [o.strip() for o in settings.cors_allow_origins.split(",") if o.strip()]
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # 在正式環境可限制為特定網域
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origins=CORS_ORIGINS,
+    allow_credentials="*" not in CORS_ORIGINS,
+    allow_methods=["GET", "POST"],
+    allow_headers=["Content-Type"],
     expose_headers=["Content-Disposition", "X-Processing-Time", "X-PDF-Pages", "X-Total-Tokens", "X-Estimated-Cost"],
+    max_age=86400,  # 預檢結果快取 24 小時，減少 OPTIONS 請求
 )
 
 
 # ==============================================
-# HTML Template for Upload Page
+# Upload Page
 # ==============================================
 
-UPLOAD_PAGE_HTML = """
-<!DOCTYPE html>
-<html lang="zh-TW">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>CB → CNS 報告轉換器</title>
-    <style>
-        * {
-            box-sizing: border-box;
-            font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, "Helvetica Neue", Arial, sans-serif;
-        }
-        body {
-            max-width: 800px;
-            margin: 0 auto;
-            padding: 40px 20px;
-            background: #f5f5f5;
-        }
-        h1 {
-            color: #333;
-            text-align: center;
-            margin-bottom: 10px;
-        }
-        .subtitle {
-            text-align: center;
-            color: #666;
-            margin-bottom: 40px;
-        }
-        .card {
-            background: white;
-            border-radius: 8px;
-            padding: 30px;
-            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-        }
-        .form-group {
-            margin-bottom: 20px;
-        }
-        label {
-            display: block;
-            margin-bottom: 8px;
-            font-weight: 600;
-            color: #333;
-        }
-        input[type="file"] {
-            width: 100%;
-            padding: 12px;
-            border: 2px dashed #ccc;
-            border-radius: 4px;
-            background: #fafafa;
-            cursor: pointer;
-        }
-        input[type="file"]:hover {
-            border-color: #007bff;
-        }
-        input[type="text"] {
-            width: 100%;
-            padding: 12px;
-            border: 1px solid #ccc;
-            border-radius: 4px;
-            font-size: 14px;
-        }
-        input[type="text"]:focus {
-            outline: none;
-            border-color: #007bff;
-            box-shadow: 0 0 0 2px rgba(0,123,255,0.1);
-        }
-        button {
-            width: 100%;
-            padding: 14px;
-            background: #007bff;
-            color: white;
-            border: none;
-            border-radius: 4px;
-            font-size: 16px;
-            font-weight: 600;
-            cursor: pointer;
-            transition: background 0.2s;
-        }
-        button:hover {
-            background: #0056b3;
-        }
-        button:disabled {
-            background: #ccc;
-            cursor: not-allowed;
-        }
-        .status {
-            margin-top: 20px;
-            padding: 15px;
-            border-radius: 4px;
-            display: none;
-        }
-        .status.loading {
-            display: block;
-            background: #e3f2fd;
-            color: #1565c0;
-        }
-        .status.success {
-            display: block;
-            background: #e8f5e9;
-            color: #2e7d32;
-        }
-        .status.error {
-            display: block;
-            background: #ffebee;
-            color: #c62828;
-        }
-        .spinner {
-            display: inline-block;
-            width: 16px;
-            height: 16px;
-            border: 2px solid #1565c0;
-            border-top-color: transparent;
-            border-radius: 50%;
-            animation: spin 1s linear infinite;
-            margin-right: 8px;
-            vertical-align: middle;
-        }
-        @keyframes spin {
-            to { transform: rotate(360deg); }
-        }
-        .note {
-            margin-top: 30px;
-            padding: 15px;
-            background: #fff3e0;
-            border-radius: 4px;
-            font-size: 14px;
-            color: #e65100;
-        }
-        .checkbox-group {
-            margin-top: 10px;
-        }
-        .checkbox-group label {
-            display: flex;
-            align-items: center;
-            font-weight: normal;
-            cursor: pointer;
-        }
-        .checkbox-group input[type="checkbox"] {
-            margin-right: 8px;
-            width: auto;
-        }
-    </style>
-</head>
-<body>
-    <h1>CB → CNS 報告轉換器</h1>
-    <p class="subtitle">上傳 CB Test Report PDF，自動產生 CNS 報告 Word 檔</p>
-
-    <div class="card">
-        <form id="uploadForm" enctype="multipart/form-data">
-            <div class="form-group">
-                <label for="pdfFile">選擇 CB Report PDF 檔案</label>
-                <input type="file" id="pdfFile" name="file" accept=".pdf" required>
-            </div>
-
-            <hr style="margin: 20px 0; border: none; border-top: 1px solid #e0e0e0;">
-            <p style="font-size: 13px; color: #666; margin-bottom: 15px;">📋 以下為台灣申請者資訊（選填，不填則空白）</p>
-
-            <div class="form-group">
-                <label for="applicantName">申請者名稱（選填）</label>
-                <input type="text" id="applicantName" name="applicant_name" placeholder="台灣申請者/代理商名稱，如：鼎福科技有限公司">
-            </div>
-
-            <div class="form-group">
-                <label for="applicantAddress">申請者地址（選填）</label>
-                <input type="text" id="applicantAddress" name="applicant_address" placeholder="台灣地址，如：新北市中和區民治街19巷8號">
-            </div>
-
-            <div class="form-group">
-                <label for="cnsReportNo">CNS 報告編號（選填）</label>
-                <input type="text" id="cnsReportNo" name="cns_report_no" placeholder="如：AST-B-25120522-000">
-            </div>
-
-            <hr style="margin: 20px 0; border: none; border-top: 1px solid #e0e0e0;">
-
-            <div class="form-group">
-                <label for="reportAuthor">報告撰寫人（選填）</label>
-                <input type="text" id="reportAuthor" name="report_author" placeholder="請輸入報告撰寫人姓名">
-            </div>
-
-            <div class="form-group">
-                <label for="reportSigner">報告簽署人（選填）</label>
-                <input type="text" id="reportSigner" name="report_signer" placeholder="請輸入報告簽署人姓名">
-            </div>
-
-            <div class="form-group">
-                <label for="seriesModel">系列型號（選填）</label>
-                <input type="text" id="seriesModel" name="series_model" placeholder="多個型號請用逗號分隔，如：MC-601, MC-602">
-            </div>
-
-            <button type="submit" id="submitBtn">開始轉換</button>
-        </form>
-
-        <div id="status" class="status"></div>
-    </div>
-
-    <div class="note">
-        <strong>注意事項：</strong>
-        <ul style="margin: 10px 0 0 20px; padding: 0;">
-            <li>請確保 PDF 檔案為有效的 CB Test Report</li>
-            <li>轉換時間依 PDF 頁數而定（約 1-5 分鐘）</li>
-            <li>請確保 templates/ 資料夾中有 CNS Word 模板</li>
-        </ul>
-    </div>
-
-    <script>
-        const form = document.getElementById('uploadForm');
-        const statusDiv = document.getElementById('status');
-        const submitBtn = document.getElementById('submitBtn');
-        let startTime = null;
-        let timerInterval = null;
-
-        // 更新計時器顯示
-        function updateTimer() {
-            if (!startTime) return;
-            const elapsed = Math.floor((Date.now() - startTime) / 1000);
-            const minutes = Math.floor(elapsed / 60);
-            const seconds = elapsed % 60;
-            const timerSpan = document.getElementById('timer');
-            if (timerSpan) {
-                timerSpan.textContent = `已執行 ${minutes}:${seconds.toString().padStart(2, '0')}`;
-            }
-        }
+# 首頁 HTML 置於 static/index.html，不再以大型字串常數編入模組
+STATIC_DIR = Path(__file__).resolve().parent / "static"
 
-        // 更新進度訊息
-        function updateProgress(message, detail = '') {
-            const progressMsg = document.getElementById('progressMsg');
-            const progressDetail = document.getElementById('progressDetail');
-            if (progressMsg) progressMsg.textContent = message;
-            if (progressDetail) progressDetail.textContent = detail;
-        }
 
-        form.addEventListener('submit', async (e) => {
-            e.preventDefault();
-
-            const fileInput = document.getElementById('pdfFile');
-
-            if (!fileInput.files.length) {
-                alert('請選擇 PDF 檔案');
-                return;
-            }
-
-            // 顯示 loading 並開始計時
-            statusDiv.className = 'status loading';
-            statusDiv.innerHTML = `
-                <div style="display: flex; align-items: center; margin-bottom: 10px;">
-                    <span class="spinner"></span>
-                    <span id="progressMsg">正在準備上傳...</span>
-                </div>
-                <div id="progressDetail" style="font-size: 13px; color: #666; margin-bottom: 5px;"></div>
-                <div id="timer" style="font-size: 12px; color: #999;">已執行 0:00</div>
-            `;
-            submitBtn.disabled = true;
-
-            // 開始計時
-            startTime = Date.now();
-            timerInterval = setInterval(updateTimer, 1000);
-
-            try {
-                const formData = new FormData();
-                formData.append('file', fileInput.files[0]);
-
-                // 台灣申請者資訊
-                const applicantName = document.getElementById('applicantName').value.trim();
-                const applicantAddress = document.getElementById('applicantAddress').value.trim();
-                const cnsReportNo = document.getElementById('cnsReportNo').value.trim();
-
-                if (applicantName) formData.append('applicant_name', applicantName);
-                if (applicantAddress) formData.append('applicant_address', applicantAddress);
-                if (cnsReportNo) formData.append('cns_report_no', cnsReportNo);
-
-                // 其他選填欄位
-                const reportAuthor = document.getElementById('reportAuthor').value.trim();
-                const reportSigner = document.getElementById('reportSigner').value.trim();
-                const seriesModel = document.getElementById('seriesModel').value.trim();
-
-                if (reportAuthor) formData.append('report_author', reportAuthor);
-                if (reportSigner) formData.append('report_signer', reportSigner);
-                if (seriesModel) formData.append('series_model', seriesModel);
-
-                // 更新進度
-                updateProgress('正在上傳 PDF 檔案...', `檔案大小：${(fileInput.files[0].size / 1024 / 1024).toFixed(2)} MB`);
-
-                // 使用 SSE 串流接收進度和結果
-                const response = await fetch('/generate-report', {
-                    method: 'POST',
-                    body: formData
-                });
-
-                if (!response.ok) {
-                    const errorText = await response.text();
-                    try {
-                        const errorData = JSON.parse(errorText);
-                        throw new Error(errorData.detail || '轉換失敗');
-                    } catch {
-                        throw new Error(errorText || '轉換失敗');
-                    }
-                }
+def _minify_html(html: str) -> str:
+    """
+    精簡首頁 HTML：移除每行前後空白、空行與整行的 JS 註解
 
-                // 讀取 SSE 串流
-                const reader = response.body.getReader();
-                const decoder = new TextDecoder();
-                let buffer = '';
-                let stats = {};
-                let filename = 'CNS_Report.docx';
-                let fileBase64 = null;
-
-                while (true) {
-                    const { done, value } = await reader.read();
-                    if (done) break;
-
-                    buffer += decoder.decode(value, { stream: true });
-
-                    // 解析 SSE 事件
-                    const lines = buffer.split('\\n');
-                    buffer = lines.pop() || '';  // 保留未完成的行
-
-                    let eventType = null;
-                    let eventData = null;
-
-                    for (const line of lines) {
-                        if (line.startsWith('event: ')) {
-                            eventType = line.slice(7).trim();
-                        } else if (line.startsWith('data: ')) {
-                            try {
-                                eventData = JSON.parse(line.slice(6));
-                            } catch (e) {
-                                console.error('Failed to parse SSE data:', line);
-                                continue;
-                            }
-
-                            // 處理事件
-                            if (eventType === 'progress' && eventData) {
-                                updateProgress(eventData.message, `進度：${eventData.percent}%`);
-                            } else if (eventType === 'error' && eventData) {
-                                throw new Error(eventData.message);
-                            } else if (eventType === 'complete' && eventData) {
-                                filename = eventData.filename;
-                                fileBase64 = eventData.file_base64;
-                                stats = eventData.stats || {};
-                            }
-
-                            eventType = null;
-                            eventData = null;
-                        }
-                    }
-                }
+    保留換行（避免影響 JS 自動補分號），不改動行內內容，因此不會破壞字串或樣板字面值
+    """
+    lines = (line.strip() for line in html.splitlines())
+    return "\n".join(line for line in lines if line and not line.startswith("//"))
+
+
+# 首頁內容為靜態檔案，於載入時讀取、精簡、預先壓縮並建立回應物件一次，避免每次請求重複處理
+# （不使用 GZipMiddleware：它會緩衝 /generate-report 的 SSE 串流，導致進度事件延遲送出）
+_UPLOAD_BYTES = _minify_html((STATIC_DIR / "index.html").read_text(encoding="utf-8")).encode("utf-8")
+_UPLOAD_ETAG = f'"{hashlib.blake2b(_UPLOAD_BYTES, digest_size=8).hexdigest()}"'
+_UPLOAD_HEADERS = {
+    "Cache-Control": "public, max-age=3600",
+    "ETag": _UPLOAD_ETAG,
+    "Vary": "Accept-Encoding",
+}
+
+# 各編碼的預壓縮內容（依優先順序排列：br 壓縮率最佳）
+_ENCODED = {
+    "br": brotli.compress(_UPLOAD_BYTES, quality=11),
+    "gzip": gzip.compress(_UPLOAD_BYTES, compresslevel=9, mtime=0),
+    "identity": _UPLOAD_BYTES,
+}
+_UPLOAD_RESPONSES = {
+    encoding: Response(
+        content=body,
+        media_type="text/html; charset=utf-8",
+        headers=_UPLOAD_HEADERS if encoding == "identity" else {**_UPLOAD_HEADERS, "Content-Encoding": encoding},
+    )
+    for encoding, body in _ENCODED.items()
+}
+_UPLOAD_NOT_MODIFIED = Response(status_code=304, headers=_UPLOAD_HEADERS)
 
-                // 檢查是否收到檔案
-                if (!fileBase64) {
-                    throw new Error('未收到檔案資料');
-                }
 
-                // 將 Base64 轉換為 Blob 並下載
-                const binaryString = atob(fileBase64);
-                const bytes = new Uint8Array(binaryString.length);
-                for (let i = 0; i < binaryString.length; i++) {
-                    bytes[i] = binaryString.charCodeAt(i);
-                }
-                const blob = new Blob([bytes], {
-                    type: 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-                });
-
-                const url = window.URL.createObjectURL(blob);
-                const a = document.createElement('a');
-                a.href = url;
-                a.download = filename;
-                document.body.appendChild(a);
-                a.click();
-                window.URL.revokeObjectURL(url);
-                document.body.removeChild(a);
-
-                // 停止計時
-                clearInterval(timerInterval);
-
-                statusDiv.className = 'status success';
-                statusDiv.innerHTML = `
-                    <div style="margin-bottom: 10px;">✓ 轉換成功！檔案已開始下載。</div>
-                    <div style="font-size: 13px; color: #2e7d32; border-top: 1px solid #c8e6c9; padding-top: 10px; margin-top: 10px;">
-                        <div><strong>執行統計：</strong></div>
-                        <div>• 處理時間：${stats.processing_time || 'N/A'} 秒</div>
-                        <div>• PDF 頁數：${stats.pdf_pages || 'N/A'} 頁</div>
-                        <div>• Token 使用量：${stats.total_tokens ? stats.total_tokens.toLocaleString() : 'N/A'}</div>
-                        <div>• 預估成本：${stats.estimated_cost ? '$' + stats.estimated_cost.toFixed(4) : 'N/A'}</div>
-                    </div>
-                `;
-
-            } catch (error) {
-                clearInterval(timerInterval);
-                statusDiv.className = 'status error';
-                statusDiv.textContent = '✗ 錯誤：' + error.message;
-            } finally {
-                submitBtn.disabled = false;
-                startTime = null;
-            }
-        });
-    </script>
-</body>
-</html>
-"""
+@lru_cache(maxsize=64)
+def _negotiate_encoding(accept_encoding: str) -> str:
+    """
+    依 Accept-Encoding（含 q 值）選擇首頁回應的編碼
+
+    瀏覽器送出的標頭種類有限，結果以 lru_cache 快取；q 值相同時依 br、gzip 順序優先
+
+    Returns:
+        "br"、"gzip" 或 "identity"
+    """
+    qvalues: Dict[str, float] = {}
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip()
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        qvalues[coding] = q
+
+    wildcard = qvalues.get("*", 0.0)
+    best, best_q = "identity", 0.0
+    for encoding in ("br", "gzip"):
+        q = qvalues.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+# ==============================================
+# Helper Functions
+# ==============================================
+
+# 上傳檔案串流寫入暫存檔時的區塊大小（1 MiB）
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# AI 萃取排隊已滿時，建議用戶端重試的等待秒數
+LLM_RETRY_AFTER = 30
+
+# LLM 萃取與填寫 Word 模板時的心跳間隔（秒）
+LLM_HEARTBEAT_INTERVAL = 10
+FILL_HEARTBEAT_INTERVAL = 5
+
+# 心跳進度事件格式固定，預先編碼為 bytes 模板，僅以 % 代入秒數與進度，不必每次 JSON 序列化
+# （訊息內容不含引號、反斜線與 %，可直接嵌入 JSON 字串）
+_LLM_HEARTBEAT_EVENT = (
+    b'event: progress\ndata: {"stage":"llm_processing","message":"'
+    + "AI 翻譯處理中...（已執行 %d 秒）".encode("utf-8")
+    + b'","percent":%d}\n\n'
+)
+_FILL_HEARTBEAT_EVENT = (
+    b'event: progress\ndata: {"stage":"template_filling","message":"'
+    + "正在填寫 Word 模板...（已執行 %d 秒）".encode("utf-8")
+    + b'","percent":95}\n\n'
+)
+
+# PDF 檔頭識別碼（含版本號，例如 %PDF-1.7、%PDF-2.0）與檔尾標記
+PDF_HEADER_RE = re.compile(rb"%PDF-[12]\.\d")
+PDF_EOF_MARKER = b"%%EOF"
+# 檔尾標記之後可能還有空白、簽章或掃描器附加的資料，檢查最後 64 KiB
+PDF_TAIL_SIZE = 64 * 1024
+
+# 暫存檔保留時間與清理間隔（秒）；tmpfs 佔用記憶體，保留時間縮短為 10 分鐘
+TEMP_FILE_MAX_AGE = 600 if USE_TMPFS else 3600
+TEMP_GC_INTERVAL = 600
+
+# 輸出檔名中非英數字、底線、連字號的字元一律替換為底線（保留中文等 Unicode 字元）
+_UNSAFE_FILENAME_RE = re.compile(r"[^\w-]")
+# 純 ASCII 檔名的快速路徑：預先建立轉換表，以單次 str.translate 完成
+_ASCII_FILENAME_TABLE = str.maketrans({
+    c: "_" for c in map(chr, range(128)) if not (c.isalnum() or c in "-_")
+})
+
+
+def _safe_unlink(path: str) -> None:
+    """刪除暫存檔，檔案不存在時忽略"""
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def _gc_temp_files(max_age: float) -> int:
+    """刪除暫存目錄中超過 max_age 秒未修改的檔案，回傳刪除數量"""
+    cutoff = time.time() - max_age
+    removed = 0
+    with os.scandir(TEMP_DIR) as it:
+        for entry in it:
+            try:
+                if entry.is_file(follow_symlinks=False) and entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+                    removed += 1
+            except FileNotFoundError:
+                continue
+    return removed
+
+
+async def _temp_gc_loop() -> None:
+    """背景任務：定期清理過期暫存檔"""
+    while True:
+        try:
+            removed = await asyncio.to_thread(_gc_temp_files, TEMP_FILE_MAX_AGE)
+            if removed:
+                logger.info("已清理 %d 個過期暫存檔", removed)
+        except Exception as e:
+            logger.warning("清理暫存檔失敗: %s", e)
+        await asyncio.sleep(TEMP_GC_INTERVAL)
+
+
+# 健康檢查回應前綴（固定欄位於載入時序列化一次，僅 uptime 於探測時格式化後串接；
+# 前綴不參與 % 格式化，設定值含 % 也不影響）
+NS_PER_SECOND = 1_000_000_000
+_HEALTH_PREFIX = orjson.dumps({
+    "status": "healthy",
+    "app_name": settings.app_name,
+    "pdf_extractor": settings.pdf_extractor
+})[:-1] + b',"uptime_s":'
+
+
+def _health_body() -> bytes:
+    """產生健康檢查回應內容（負載平衡器高頻探測時不重建 dict、不重新序列化）"""
+    return _HEALTH_PREFIX + b"%d}" % ((time.monotonic_ns() - START_NS) // NS_PER_SECOND)
+
+
+@lru_cache(maxsize=1)
+def _mock_schema_json() -> Tuple[bytes, str]:
+    """模擬 Schema 內容固定，首次呼叫時以 Pydantic 序列化為 JSON bytes 並計算 ETag 後快取"""
+    body = create_mock_schema().model_dump_json().encode("utf-8")
+    return body, f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+
+
+def _sanitize_filename(name: str) -> str:
+    """將檔名中不安全的字元替換為底線（ASCII 使用轉換表，其餘使用正則）"""
+    if name.isascii():
+        return name.translate(_ASCII_FILENAME_TABLE)
+    return _UNSAFE_FILENAME_RE.sub("_", name)
+
+
+def _download_path(token: str, filename: str) -> str:
+    """下載檔案的暫存路徑（token 為隨機值，避免同名檔案互相覆寫與被猜測）"""
+    return os.path.join(TEMP_DIR, f"{token}_{filename}")
+
+
+def _download_url(token: str, filename: str) -> str:
+    """下載檔案的 URL（檔名可能含中文，需 percent-encode）"""
+    return f"/download/{token}/{quote(filename)}"
+
+
+def _link_or_copy(src_path: str, dst_path: str) -> None:
+    """以 hard link 建立檔案副本，跨檔案系統時改為複製"""
+    try:
+        os.link(src_path, dst_path)
+    except OSError:
+        shutil.copyfile(src_path, dst_path)
+
+
+@lru_cache(maxsize=4)
+def _scan_templates(template_dir: str, dir_mtime_ns: int) -> Tuple[str, ...]:
+    """
+    列出模板目錄中的 .docx 檔案（以目錄 mtime 作為快取鍵）
+
+    目錄內容變動時 mtime 會改變而自動重新掃描；使用 os.scandir 單次走訪並略過子目錄
+    """
+    with os.scandir(template_dir) as it:
+        return tuple(
+            e.name for e in it
+            if e.name.endswith('.docx') and not e.name.startswith('~') and e.is_file()
+        )
+
+
+def _list_templates(template_dir: str = TEMPLATE_DIR) -> Tuple[str, ...]:
+    """取得模板清單，目錄未變動時僅需一次 os.stat"""
+    return _scan_templates(template_dir, os.stat(template_dir).st_mtime_ns)
+
+
+@lru_cache(maxsize=4)
+def _select_template(template_dir: str, dir_mtime_ns: int) -> Optional[str]:
+    """
+    選擇要使用的模板路徑（以目錄 mtime 作為快取鍵）
+
+    優先使用含 placeholder 的模板，否則使用第一個模板；沒有模板時回傳 None
+    """
+    template_files = _scan_templates(template_dir, dir_mtime_ns)
+    if not template_files:
+        return None
+    template_name = next((f for f in template_files if '.placeholder.' in f), template_files[0])
+    return os.path.join(template_dir, template_name)
+
+
+def _resolve_template(template_dir: str = TEMPLATE_DIR) -> Optional[str]:
+    """取得目前使用的模板路徑，目錄未變動時僅需一次 os.stat"""
+    return _select_template(template_dir, os.stat(template_dir).st_mtime_ns)
+
+
+def _check_llm_capacity(limiter: anyio.CapacityLimiter) -> None:
+    """等待 AI 萃取的報告過多時直接回傳 503，不再接受新請求排隊"""
+    if limiter.statistics().tasks_waiting >= settings.llm_queue_max:
+        raise HTTPException(
+            status_code=503,
+            detail="伺服器忙碌中，請稍後再試",
+            headers={"Retry-After": str(LLM_RETRY_AFTER)}
+        )
+
+
+async def _extract_schema_bounded(limiter: anyio.CapacityLimiter, extract_json: dict, client):
+    """在 limiter 限制下執行 AI 萃取（超過上限的請求排隊等待）"""
+    async with limiter:
+        return await extract_report_schema_from_adobe_json(extract_json, client=client)
+
+
+def _preload_template(template_path: str):
+    """
+    預先準備模板副本（同步，供 asyncio.to_thread 呼叫）
+
+    失敗時回傳 None，由填寫步驟自行載入並回報錯誤
+    """
+    try:
+        return load_template_document(template_path)
+    except Exception as e:
+        logger.warning("預先載入模板失敗: %s", e)
+        return None
+
+
+async def _fill_template(
+    limiter: anyio.CapacityLimiter,
+    schema,
+    template_path: str,
+    output_path: str,
+    user_inputs: Dict[str, str],
+    template_doc=None
+) -> None:
+    """於執行緒池填寫 Word 模板，並以 limiter 限制同時進行的填寫數量"""
+    await anyio.to_thread.run_sync(
+        partial(
+            fill_cns_template, schema, template_path, output_path,
+            user_inputs=user_inputs, template_doc=template_doc
+        ),
+        limiter=limiter
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class ReqCtx:
+    """單一報告轉換請求的狀態（於 endpoint 建立一次，傳入 SSE 串流生成器）"""
+    pdf_path: str
+    pdf_digest: str
+    pdf_filename: str
+    user_inputs: Dict[str, str]
+    use_mock: bool
+    disable_cache: bool
+    start_ns: int
+
+
+def _build_user_inputs(
+    applicant_name: str,
+    applicant_address: str,
+    cns_report_no: str,
+    report_author: str,
+    report_signer: str,
+    series_model: str
+) -> Dict[str, str]:
+    """
+    整理使用者輸入欄位（去除前後空白）
+    """
+    return {
+        "applicant_name": applicant_name.strip() if applicant_name else "",
+        "applicant_address": applicant_address.strip() if applicant_address else "",
+        "cns_report_no": cns_report_no.strip() if cns_report_no else "",
+        "report_author": report_author.strip() if report_author else "",
+        "report_signer": report_signer.strip() if report_signer else "",
+        "series_model": series_model.strip() if series_model else ""
+    }
+
+
+async def _spool_upload(file: UploadFile, max_size: int) -> Tuple[str, int, str]:
+    """
+    將上傳的 PDF 以固定大小區塊串流寫入暫存檔
+
+    邊讀取邊累計大小，超過上限立即中止，避免整份 PDF 載入記憶體
+    第一個區塊先檢查 PDF 檔頭，非 PDF 檔案不會寫入磁碟；結尾缺少 %%EOF 時記錄警告（可能傳輸不完整）
+    寫入同時計算內容 SHA-256（OpenSSL 實作，支援 SHA-NI 指令集），供報告快取使用
+
+    Args:
+        file: 上傳的檔案
+        max_size: 允許的最大位元組數
+
+    Returns:
+        (暫存檔路徑, 檔案大小, 內容 SHA-256 hex)
+    """
+    first_chunk = await file.read(UPLOAD_CHUNK_SIZE)
+    # PDF 規格允許檔頭出現在前 1024 bytes 內
+    if not PDF_HEADER_RE.search(first_chunk, 0, 1024):
+        raise HTTPException(status_code=400, detail="不是有效的 PDF 檔案")
+    # 加密字典通常位於檔尾 trailer，線性化 PDF 則在檔案開頭附近；僅記錄提示不拒絕：
+    # 權限限制（owner password）不影響 PyMuPDF 擷取，Adobe 擷取前則會先以 qpdf 解鎖
+    encrypted_hint = b"/Encrypt" in first_chunk[:4096]
+
+    fd, tmp_path = tempfile.mkstemp(suffix=".pdf", dir=TEMP_DIR)
+    os.close(fd)
+
+    total = 0
+    hasher = hashlib.sha256()
+    tail = b""
+    chunk = first_chunk
+    try:
+        async with aiofiles.open(tmp_path, "wb") as out:
+            while chunk:
+                total += len(chunk)
+                if total > max_size:
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"檔案過大，最大允許 {settings.max_pdf_size_mb} MB"
+                    )
+                hasher.update(chunk)
+                await out.write(chunk)
+                tail = (tail + chunk[-PDF_TAIL_SIZE:])[-PDF_TAIL_SIZE:]
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+    except BaseException:
+        _safe_unlink(tmp_path)
+        raise
+
+    # 多數閱讀器可容忍缺少檔尾標記的 PDF，僅記錄警告，由擷取器判斷是否可解析
+    if PDF_EOF_MARKER not in tail:
+        logger.warning("PDF 檔尾 %d bytes 內未找到 %%%%EOF，檔案可能不完整", PDF_TAIL_SIZE)
+
+    if encrypted_hint or b"/Encrypt" in tail:
+        logger.info("PDF 已加密（含權限限制），交由擷取器處理")
+
+    return tmp_path, total, hasher.hexdigest()
 
 
 # ==============================================
@@ -504,11 +550,13 @@ UPLOAD_PAGE_HTML = """
 # ==============================================
 
 @app.get("/", response_class=HTMLResponse)
-async def root():
+async def root(request: Request):
     """
     首頁：提供簡易的上傳介面
     """
-    return UPLOAD_PAGE_HTML
+    if _UPLOAD_ETAG in request.headers.get("if-none-match", ""):
+        return _UPLOAD_NOT_MODIFIED
+    return _UPLOAD_RESPONSES[_negotiate_encoding(request.headers.get("accept-encoding", ""))]
 
 
 @app.get("/health")
@@ -516,51 +564,54 @@ async def health_check():
     """
     健康檢查 endpoint
     """
-    return {
-        "status": "healthy",
-        "app_name": settings.app_name,
-        "pdf_extractor": settings.pdf_extractor,
-        "timestamp": datetime.now().isoformat()
-    }
+    return Response(content=_health_body(), media_type="application/json")
 
 
 @app.post("/generate-report")
 async def generate_report(
+    request: Request,
     file: UploadFile = File(..., description="CB Report PDF 檔案"),
     applicant_name: str = Form(default="", description="台灣申請者名稱"),
     applicant_address: str = Form(default="", description="台灣申請者地址"),
     cns_report_no: str = Form(default="", description="CNS 報告編號"),
     report_author: str = Form(default="", description="報告撰寫人"),
     report_signer: str = Form(default="", description="報告簽署人"),
-    series_model: str = Form(default="", description="系列型號（逗號分隔）")
+    series_model: str = Form(default="", description="系列型號（逗號分隔）"),
+    use_mock: bool = Form(default=False, description="是否使用模擬資料"),
+    disable_cache: bool = Form(default=False, description="略過快取，強制重新擷取與翻譯")
 ):
     """
     主要 API：將 CB PDF 轉換為 CNS Word 報告
     使用 Server-Sent Events (SSE) 串流回傳進度，避免長時間請求超時
 
     流程：
-    1. 讀取上傳的 PDF 檔案
+    1. 串流讀取上傳的 PDF 檔案至暫存檔
     2. 呼叫 Adobe PDF Extract API 萃取內容
     3. 呼叫 Azure OpenAI 將內容轉換為統一 Schema
     4. 使用 Schema 填寫 CNS Word 模板
-    5. 回傳填好的 Word 檔案（Base64 編碼）
+    5. 回傳填好的 Word 檔案下載連結（/download）
 
     Returns:
-        StreamingResponse: SSE 串流，最後包含 Base64 編碼的 Word 檔案
+        StreamingResponse: SSE 串流，最後的 complete 事件包含 Word 檔案的下載連結
     """
-    start_time = time.time()
+    start_ns = time.monotonic_ns()
     pdf_filename = file.filename
 
-    logger.info("=" * 50)
-    logger.info("收到報告轉換請求")
-    logger.info(f"檔案名稱: {pdf_filename}")
-    logger.info(f"台灣申請者: {applicant_name or '(未填，使用 CB 報告資訊)'}")
-    logger.info(f"申請者地址: {applicant_address or '(未填)'}")
-    logger.info(f"CNS 報告編號: {cns_report_no or '(未填)'}")
-    logger.info(f"報告撰寫人: {report_author or '(未填)'}")
-    logger.info(f"報告簽署人: {report_signer or '(未填)'}")
-    logger.info(f"系列型號: {series_model or '(未填)'}")
-    logger.info("=" * 50)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(_BANNER)
+        logger.info("收到報告轉換請求")
+        logger.info("檔案名稱: %s", pdf_filename)
+        logger.info("台灣申請者: %s", applicant_name or '(未填，使用 CB 報告資訊)')
+        logger.info("申請者地址: %s", applicant_address or '(未填)')
+        logger.info("CNS 報告編號: %s", cns_report_no or '(未填)')
+        logger.info("報告撰寫人: %s", report_author or '(未填)')
+        logger.info("報告簽署人: %s", report_signer or '(未填)')
+        logger.info("系列型號: %s", series_model or '(未填)')
+        if use_mock:
+            logger.info("模擬資料: 是")
+        if disable_cache:
+            logger.info("略過快取: 是")
+        logger.info(_BANNER)
 
     # 驗證檔案類型
     if not pdf_filename.lower().endswith('.pdf'):
@@ -569,141 +620,220 @@ async def generate_report(
             detail="請上傳 PDF 檔案"
         )
 
-    # 讀取 PDF 內容
-    try:
-        pdf_bytes = await file.read()
-        logger.info(f"PDF 大小: {len(pdf_bytes)} bytes")
+    # multipart 解析時 Starlette 已記錄檔案大小，超過上限直接拒絕，不必再複製一次
+    if file.size is not None and file.size > MAX_PDF_BYTES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"檔案過大，最大允許 {settings.max_pdf_size_mb} MB"
+        )
 
-        # 檢查檔案大小
-        max_size = settings.max_pdf_size_mb * 1024 * 1024
-        if len(pdf_bytes) > max_size:
-            raise HTTPException(
-                status_code=400,
-                detail=f"檔案過大，最大允許 {settings.max_pdf_size_mb} MB"
-            )
+    # AI 萃取排隊已滿時，在寫入暫存檔前即拒絕
+    if not use_mock:
+        _check_llm_capacity(request.app.state.llm_limiter)
+
+    # 串流寫入暫存檔（邊讀邊檢查檔案大小）
+    try:
+        pdf_path, pdf_size, pdf_digest = await _spool_upload(file, MAX_PDF_BYTES)
+        logger.info("PDF 大小: %d bytes", pdf_size)
 
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"讀取 PDF 失敗: {e}")
+        logger.error("讀取 PDF 失敗: %s", e)
         raise HTTPException(status_code=400, detail=f"讀取 PDF 失敗: {str(e)}")
 
+    # 串流生成器所需的請求狀態集中於單一物件傳入，不再逐一以 nonlocal 捕捉
+    ctx = ReqCtx(
+        pdf_path=pdf_path,
+        pdf_digest=pdf_digest,
+        pdf_filename=pdf_filename,
+        user_inputs=_build_user_inputs(
+            applicant_name, applicant_address, cns_report_no,
+            report_author, report_signer, series_model
+        ),
+        use_mock=use_mock,
+        disable_cache=disable_cache,
+        start_ns=start_ns
+    )
+
     # 使用 SSE 串流回傳進度
-    async def generate_stream():
+    async def generate_stream(ctx: ReqCtx):
         """SSE 串流生成器"""
-        nonlocal pdf_bytes, pdf_filename, applicant_name, applicant_address
-        nonlocal cns_report_no, report_author, report_signer, series_model, start_time
+        def send_event(event_type: str, data: dict) -> bytes:
+            """發送 SSE 事件（orjson 直接輸出 UTF-8 bytes，StreamingResponse 不必再編碼）"""
+            return b"event: " + event_type.encode("ascii") + b"\ndata: " + orjson.dumps(data) + b"\n\n"
 
-        def send_event(event_type: str, data: dict):
-            """發送 SSE 事件"""
-            return f"event: {event_type}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+        output_path: Optional[str] = None
+        template_task: Optional[asyncio.Task] = None
 
         try:
-            yield send_event("progress", {"stage": "pdf_extract", "message": "正在解析 PDF 內容...", "percent": 10})
+            # Step 1: 尋找 Word 模板（先確認模板存在，並作為快取鍵的一部分）
+            template_path = await asyncio.to_thread(_resolve_template, request.app.state.template_dir)
 
-            # Step 1: PDF Extract
-            extractor = settings.pdf_extractor.lower()
-            logger.info(f"使用 PDF 擷取引擎: {extractor}")
+            if not template_path:
+                yield send_event("error", {"message": "找不到 CNS 報告模板"})
+                return
 
-            if extractor == "pymupdf":
-                logger.info("呼叫 PyMuPDF 擷取 PDF...")
-                try:
-                    extract_json = await pymupdf_extract_pdf(pdf_bytes)
-                except PyMuPDFExtractError as e:
-                    logger.error(f"PyMuPDF Extract 失敗: {e}")
-                    yield send_event("error", {"message": f"PDF 解析失敗: {str(e)}"})
+            pdf_basename = os.path.splitext(ctx.pdf_filename)[0]
+            safe_basename = _sanitize_filename(pdf_basename)
+            output_filename = f"AST-B-{safe_basename}.docx"
+
+            # 相同 PDF、模板與輸入已產生過報告時，直接回傳快取結果
+            # disable_cache 時不讀取快取，但仍寫入新結果
+            use_cache = not ctx.use_mock and report_cache.is_cache_enabled()
+            cache_key: Optional[str] = None
+            schema_cache_key: Optional[str] = None
+            cached_schema = None
+            if use_cache:
+                cache_key = await asyncio.to_thread(
+                    report_cache.make_cache_key, ctx.pdf_digest, template_path, ctx.user_inputs
+                )
+                schema_cache_key = report_cache.make_schema_cache_key(ctx.pdf_digest)
+                cached_path = None
+                if not ctx.disable_cache:
+                    cached_path = await asyncio.to_thread(report_cache.get_cached_report, cache_key)
+                if cached_path:
+                    logger.info("報告快取命中: %s", cache_key)
+                    # 下載後檔案即被刪除，因此另建一份連結，不直接提供快取檔案
+                    download_token = secrets.token_hex(16)
+                    await asyncio.to_thread(
+                        _link_or_copy, cached_path, _download_path(download_token, output_filename)
+                    )
+                    yield send_event("complete", {
+                        "filename": output_filename,
+                        "download_url": _download_url(download_token, output_filename),
+                        "stats": {
+                            "processing_time": round((time.monotonic_ns() - ctx.start_ns) / NS_PER_SECOND, 2),
+                            "pdf_pages": 0,
+                            "total_tokens": 0,
+                            "estimated_cost": 0,
+                            "cached": True
+                        }
+                    })
                     return
+
+                # 報告未命中時，若同一份 PDF 已萃取過 Schema（例如僅使用者輸入不同），直接重用
+                if not ctx.disable_cache:
+                    cached_schema = await asyncio.to_thread(report_cache.get_cached_schema, schema_cache_key)
+
+            # 模板副本的準備與 PDF 擷取 / AI 翻譯同時進行，填寫時直接使用
+            template_task = asyncio.create_task(asyncio.to_thread(_preload_template, template_path))
+
+            yield send_event("progress", {"stage": "pdf_extract", "message": "正在解析 PDF 內容...", "percent": 10})
+
+            if ctx.use_mock:
+                # 使用模擬資料：略過 PDF 擷取與 AI 翻譯（開發測試用）
+                logger.info("使用模擬資料，略過 PDF 擷取與 AI 翻譯")
+                schema = create_mock_schema()
+                pdf_pages = 0
+                llm_stats = None
+            elif cached_schema:
+                logger.info("Schema 快取命中: %s", schema_cache_key)
+                schema, pdf_pages = cached_schema
+                llm_stats = None
             else:
-                logger.info("呼叫 Adobe PDF Extract API...")
+                # Step 2: PDF Extract
+                extractor = settings.pdf_extractor.lower()
+                logger.info("使用 PDF 擷取引擎: %s", extractor)
+
+                if extractor == "pymupdf":
+                    logger.info("呼叫 PyMuPDF 擷取 PDF...")
+                    try:
+                        extract_json = await pymupdf_extract_pdf(ctx.pdf_path, executor=request.app.state.pdf_executor)
+                    except PyMuPDFExtractError as e:
+                        logger.error("PyMuPDF Extract 失敗: %s", e)
+                        yield send_event("error", {"message": f"PDF 解析失敗: {str(e)}"})
+                        return
+                else:
+                    logger.info("呼叫 Adobe PDF Extract API...")
+                    try:
+                        extract_json = await adobe_extract_pdf(ctx.pdf_path, client=request.app.state.adobe_client)
+                    except AdobeExtractError as e:
+                        logger.error("Adobe Extract 失敗: %s", e)
+                        yield send_event("error", {"message": f"PDF 解析失敗: {str(e)}"})
+                        return
+
+                pdf_pages = extract_json.get("metadata", {}).get("total_pages", 0)
+                yield send_event("progress", {"stage": "llm_start", "message": f"PDF 解析完成（{pdf_pages} 頁），正在進行 AI 翻譯...", "percent": 25})
+
+                # Step 3: Azure OpenAI Schema Extraction（這是最耗時的步驟）
+                # 每 10 秒發送一次心跳，保持連線；任務完成時立即結束等待，不必等到下一次心跳
+                llm_stats = None
+                llm_task = asyncio.create_task(_extract_schema_bounded(
+                    request.app.state.llm_limiter, extract_json, request.app.state.llm
+                ))
+
+                heartbeat_count = 0
+                while True:
+                    done, _ = await asyncio.wait({llm_task}, timeout=LLM_HEARTBEAT_INTERVAL)
+                    if done:
+                        break
+                    heartbeat_count += 1
+                    progress_percent = min(25 + heartbeat_count * 5, 85)
+                    yield _LLM_HEARTBEAT_EVENT % (heartbeat_count * LLM_HEARTBEAT_INTERVAL, progress_percent)
+
                 try:
-                    extract_json = await adobe_extract_pdf(pdf_bytes)
-                except AdobeExtractError as e:
-                    logger.error(f"Adobe Extract 失敗: {e}")
-                    yield send_event("error", {"message": f"PDF 解析失敗: {str(e)}"})
+                    schema, llm_stats = await llm_task
+                except Exception as e:
+                    logger.error("Schema 萃取失敗: %s", e)
+                    yield send_event("error", {"message": f"資料萃取失敗: {str(e)}"})
                     return
 
-            pdf_pages = extract_json.get("metadata", {}).get("total_pages", 0)
-            yield send_event("progress", {"stage": "llm_start", "message": f"PDF 解析完成（{pdf_pages} 頁），正在進行 AI 翻譯...", "percent": 25})
-
-            # Step 2: Azure OpenAI Schema Extraction（這是最耗時的步驟）
-            # 每 10 秒發送一次心跳，保持連線
-            llm_stats = None
-            llm_task = asyncio.create_task(extract_report_schema_from_adobe_json(extract_json))
-
-            heartbeat_count = 0
-            while not llm_task.done():
-                await asyncio.sleep(10)
-                heartbeat_count += 1
-                progress_percent = min(25 + heartbeat_count * 5, 85)
-                yield send_event("progress", {
-                    "stage": "llm_processing",
-                    "message": f"AI 翻譯處理中...（已執行 {heartbeat_count * 10} 秒）",
-                    "percent": progress_percent
-                })
-
-            try:
-                schema, llm_stats = await llm_task
-            except Exception as e:
-                logger.error(f"Schema 萃取失敗: {e}")
-                yield send_event("error", {"message": f"資料萃取失敗: {str(e)}"})
-                return
+                if schema_cache_key:
+                    try:
+                        await asyncio.to_thread(report_cache.store_schema, schema_cache_key, schema, pdf_pages)
+                    except Exception as e:
+                        logger.warning("寫入 Schema 快取失敗: %s", e)
 
             yield send_event("progress", {"stage": "template", "message": "AI 翻譯完成，正在產生 Word 文件...", "percent": 90})
 
             # 設定來源檔名
-            schema.source_filename = pdf_filename
-
-            # Step 3: 尋找 Word 模板
-            template_dir = os.path.join(os.path.dirname(__file__), "..", settings.template_dir)
-            template_files = [
-                f for f in os.listdir(template_dir)
-                if f.endswith('.docx') and not f.startswith('~')
-            ]
-
-            if not template_files:
-                yield send_event("error", {"message": "找不到 CNS 報告模板"})
-                return
-
-            placeholder_templates = [f for f in template_files if '.placeholder.' in f]
-            if placeholder_templates:
-                template_path = os.path.join(template_dir, placeholder_templates[0])
-            else:
-                template_path = os.path.join(template_dir, template_files[0])
+            schema.source_filename = ctx.pdf_filename
 
             # Step 4: 填寫 Word 模板
-            pdf_basename = os.path.splitext(pdf_filename)[0]
-            safe_basename = "".join(c if c.isalnum() or c in "-_" else "_" for c in pdf_basename)
-            output_filename = f"AST-B-{safe_basename}.docx"
-            output_path = os.path.join(settings.temp_dir, output_filename)
-
-            user_inputs = {
-                "applicant_name": applicant_name.strip() if applicant_name else "",
-                "applicant_address": applicant_address.strip() if applicant_address else "",
-                "cns_report_no": cns_report_no.strip() if cns_report_no else "",
-                "report_author": report_author.strip() if report_author else "",
-                "report_signer": report_signer.strip() if report_signer else "",
-                "series_model": series_model.strip() if series_model else ""
-            }
+            # 直接寫入下載路徑（以隨機 token 為前綴），完成後不必再搬移檔案
+            download_token = secrets.token_hex(16)
+            output_path = _download_path(download_token, output_filename)
+
+            # python-docx 讀寫為同步阻塞操作，移至執行緒池避免卡住 event loop
+            # 填寫期間持續發送進度事件，讓前端與代理伺服器知道連線仍在處理中
+            template_doc = await template_task
+            fill_task = asyncio.create_task(_fill_template(
+                request.app.state.fill_limiter, schema, template_path, output_path, ctx.user_inputs,
+                template_doc=template_doc
+            ))
+            fill_elapsed = 0
+            while True:
+                done, _ = await asyncio.wait({fill_task}, timeout=FILL_HEARTBEAT_INTERVAL)
+                if done:
+                    break
+                fill_elapsed += FILL_HEARTBEAT_INTERVAL
+                yield _FILL_HEARTBEAT_EVENT % fill_elapsed
 
             try:
-                fill_cns_template(schema, template_path, output_path, user_inputs=user_inputs)
+                fill_task.result()
             except Exception as e:
-                logger.error(f"填寫模板失敗: {e}")
+                logger.error("填寫模板失敗: %s", e)
                 yield send_event("error", {"message": f"填寫模板失敗: {str(e)}"})
                 return
 
-            # Step 5: 讀取檔案並以 Base64 編碼回傳
-            with open(output_path, "rb") as f:
-                file_content = f.read()
-            file_base64 = base64.b64encode(file_content).decode("utf-8")
+            if cache_key:
+                try:
+                    await asyncio.to_thread(report_cache.store_report, cache_key, output_path)
+                except Exception as e:
+                    logger.warning("寫入報告快取失敗: %s", e)
+
+            # Step 5: 回傳下載連結（檔案由 /download 直接以二進位傳送，不經 Base64 編碼）
+            # 檔案交由下載端點刪除；未下載的檔案由暫存檔定期清理移除
+            output_path = None
 
-            processing_time = round(time.time() - start_time, 2)
-            logger.info(f"轉換完成，總處理時間: {processing_time} 秒")
+            processing_time = round((time.monotonic_ns() - ctx.start_ns) / NS_PER_SECOND, 2)
+            logger.info("轉換完成，總處理時間: %s 秒", processing_time)
 
-            # 發送完成事件，包含檔案資料
+            # 發送完成事件，包含下載連結
             yield send_event("complete", {
                 "filename": output_filename,
-                "file_base64": file_base64,
+                "download_url": _download_url(download_token, output_filename),
                 "stats": {
                     "processing_time": processing_time,
                     "pdf_pages": pdf_pages,
@@ -713,11 +843,19 @@ async def generate_report(
             })
 
         except Exception as e:
-            logger.error(f"串流處理錯誤: {e}", exc_info=True)
+            logger.error("串流處理錯誤: %s", e, exc_info=True)
             yield send_event("error", {"message": f"處理過程發生錯誤: {str(e)}"})
 
+        finally:
+            # 上傳的 PDF 已不再需要；Word 暫存檔僅在未完成時刪除
+            _safe_unlink(ctx.pdf_path)
+            if output_path:
+                _safe_unlink(output_path)
+            if template_task is not None and not template_task.done():
+                template_task.cancel()
+
     return StreamingResponse(
-        generate_stream(),
+        generate_stream(ctx),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
@@ -727,33 +865,282 @@ async def generate_report(
     )
 
 
+# 下載 token 格式（secrets.token_hex(16)）
+_DOWNLOAD_TOKEN_RE = re.compile(r"[0-9a-f]{32}")
+DOCX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+@app.get("/download/{token}/{filename}")
+async def download_report(token: str, filename: str):
+    """
+    下載產生的 Word 報告（一次性連結）
+
+    由 /generate-report 的 complete 事件提供連結；檔案傳送完成後即刪除
+    """
+    if not _DOWNLOAD_TOKEN_RE.fullmatch(token) or os.path.basename(filename) != filename:
+        raise HTTPException(status_code=404, detail="檔案不存在或已下載")
+
+    path = _download_path(token, filename)
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="檔案不存在或已下載")
+
+    return FileResponse(
+        path,
+        media_type=DOCX_MEDIA_TYPE,
+        filename=filename,
+        background=BackgroundTask(_safe_unlink, path)
+    )
+
+
+# ==============================================
+# Batch Conversion
+# ==============================================
+
+# 批次轉換：單次請求的檔案數上限與同時處理的檔案數
+BATCH_MAX_FILES = 50
+BATCH_MAX_CONCURRENT = 4
+
+
+async def _generate_single(
+    app_state,
+    pdf_path: str,
+    pdf_digest: str,
+    pdf_filename: str,
+    template_path: str,
+    user_inputs: Dict[str, str],
+    use_mock: bool,
+    disable_cache: bool
+) -> Tuple[str, bool]:
+    """
+    產生單一份報告（批次轉換用，流程與 /generate-report 相同但不發送進度事件）
+
+    Returns:
+        (Word 檔案路徑, 是否為暫存檔)；快取命中時回傳快取檔案路徑，呼叫端不可刪除
+    """
+    use_cache = not use_mock and report_cache.is_cache_enabled()
+    cache_key: Optional[str] = None
+    schema_cache_key: Optional[str] = None
+    cached_schema = None
+    if use_cache:
+        cache_key = await asyncio.to_thread(
+            report_cache.make_cache_key, pdf_digest, template_path, user_inputs
+        )
+        schema_cache_key = report_cache.make_schema_cache_key(pdf_digest)
+        if not disable_cache:
+            cached_path = await asyncio.to_thread(report_cache.get_cached_report, cache_key)
+            if cached_path:
+                logger.info("報告快取命中: %s", cache_key)
+                return cached_path, False
+            cached_schema = await asyncio.to_thread(report_cache.get_cached_schema, schema_cache_key)
+
+    if use_mock:
+        schema = create_mock_schema()
+    elif cached_schema:
+        schema, _ = cached_schema
+    else:
+        if settings.pdf_extractor.lower() == "pymupdf":
+            extract_json = await pymupdf_extract_pdf(pdf_path, executor=app_state.pdf_executor)
+        else:
+            extract_json = await adobe_extract_pdf(pdf_path, client=app_state.adobe_client)
+
+        schema, _ = await _extract_schema_bounded(app_state.llm_limiter, extract_json, app_state.llm)
+
+        if schema_cache_key:
+            pdf_pages = extract_json.get("metadata", {}).get("total_pages", 0)
+            try:
+                await asyncio.to_thread(report_cache.store_schema, schema_cache_key, schema, pdf_pages)
+            except Exception as e:
+                logger.warning("寫入 Schema 快取失敗: %s", e)
+
+    schema.source_filename = pdf_filename
+
+    output_path = os.path.join(TEMP_DIR, f"{uuid.uuid4().hex}.docx")
+    try:
+        await _fill_template(app_state.fill_limiter, schema, template_path, output_path, user_inputs)
+    except BaseException:
+        _safe_unlink(output_path)
+        raise
+
+    if cache_key:
+        try:
+            await asyncio.to_thread(report_cache.store_report, cache_key, output_path)
+        except Exception as e:
+            logger.warning("寫入報告快取失敗: %s", e)
+
+    return output_path, True
+
+
+def _write_zip(zip_path: str, entries: List[Tuple[str, str]], errors: List[str]) -> None:
+    """
+    將產出的報告寫入 ZIP 檔
+
+    .docx 本身已是壓縮格式，以 ZIP_STORED 直接存入，不再重複壓縮
+
+    Args:
+        zip_path: 輸出 ZIP 路徑
+        entries: (ZIP 內檔名, 檔案路徑) 列表
+        errors: 失敗檔案的錯誤訊息，非空時另存為 errors.txt
+    """
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_STORED) as zf:
+        for arcname, path in entries:
+            zf.write(path, arcname)
+        if errors:
+            zf.writestr("errors.txt", "\n".join(errors))
+
+
+@app.post("/generate-reports")
+async def generate_reports(
+    request: Request,
+    files: List[UploadFile] = File(..., description="CB Report PDF 檔案（可多個）"),
+    applicant_name: str = Form(default="", description="台灣申請者名稱"),
+    applicant_address: str = Form(default="", description="台灣申請者地址"),
+    cns_report_no: str = Form(default="", description="CNS 報告編號"),
+    report_author: str = Form(default="", description="報告撰寫人"),
+    report_signer: str = Form(default="", description="報告簽署人"),
+    series_model: str = Form(default="", description="系列型號（逗號分隔）"),
+    use_mock: bool = Form(default=False, description="是否使用模擬資料"),
+    disable_cache: bool = Form(default=False, description="略過快取，強制重新擷取與翻譯")
+):
+    """
+    批次 API：一次上傳多份 CB PDF，回傳包含所有 CNS Word 報告的 ZIP 檔
+
+    多份檔案共用同一個請求與模板，並以 Semaphore 限制同時處理的數量；
+    單一檔案失敗不影響其他檔案，錯誤訊息寫入 ZIP 內的 errors.txt
+
+    Returns:
+        FileResponse: ZIP 檔案
+    """
+    start_ns = time.monotonic_ns()
+    logger.info("收到批次轉換請求，共 %d 個檔案", len(files))
+
+    if len(files) > BATCH_MAX_FILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"檔案數量過多，單次最多 {BATCH_MAX_FILES} 個"
+        )
+
+    for file in files:
+        if not file.filename.lower().endswith('.pdf'):
+            raise HTTPException(status_code=400, detail=f"請上傳 PDF 檔案: {file.filename}")
+        if file.size is not None and file.size > MAX_PDF_BYTES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"檔案過大，最大允許 {settings.max_pdf_size_mb} MB: {file.filename}"
+            )
+
+    # 檔案數量、類型與大小驗證通過後，AI 萃取排隊已滿才回 503（無效請求一律回 400）
+    if not use_mock:
+        _check_llm_capacity(request.app.state.llm_limiter)
+
+    template_path = await asyncio.to_thread(_resolve_template, request.app.state.template_dir)
+    if not template_path:
+        raise HTTPException(status_code=500, detail="找不到 CNS 報告模板")
+
+    user_inputs = _build_user_inputs(
+        applicant_name, applicant_address, cns_report_no,
+        report_author, report_signer, series_model
+    )
+
+    pdf_paths: List[str] = []
+    outputs: List[Tuple[str, bool]] = []
+    try:
+        spooled = []
+        for file in files:
+            pdf_path, _, pdf_digest = await _spool_upload(file, MAX_PDF_BYTES)
+            pdf_paths.append(pdf_path)
+            spooled.append((file.filename, pdf_path, pdf_digest))
+
+        semaphore = asyncio.Semaphore(BATCH_MAX_CONCURRENT)
+
+        async def _run(pdf_filename: str, pdf_path: str, pdf_digest: str) -> Tuple[str, bool]:
+            async with semaphore:
+                return await _generate_single(
+                    request.app.state, pdf_path, pdf_digest, pdf_filename,
+                    template_path, user_inputs, use_mock, disable_cache
+                )
+
+        results = await asyncio.gather(
+            *(_run(*item) for item in spooled),
+            return_exceptions=True
+        )
+
+        # 依上傳順序整理結果；同名檔案加上序號避免 ZIP 內檔名重複
+        entries: List[Tuple[str, str]] = []
+        errors: List[str] = []
+        used_names = set()
+        for (pdf_filename, _, _), result in zip(spooled, results):
+            if isinstance(result, BaseException):
+                logger.error("批次轉換失敗 %s: %s", pdf_filename, result)
+                errors.append(f"{pdf_filename}: {result}")
+                continue
+            outputs.append(result)
+            base = f"AST-B-{_sanitize_filename(os.path.splitext(pdf_filename)[0])}"
+            arcname = f"{base}.docx"
+            n = 1
+            while arcname in used_names:
+                n += 1
+                arcname = f"{base}_{n}.docx"
+            used_names.add(arcname)
+            entries.append((arcname, result[0]))
+
+        if not entries:
+            raise HTTPException(status_code=500, detail=f"所有檔案皆轉換失敗: {errors[0]}")
+
+        fd, zip_path = tempfile.mkstemp(suffix=".zip", dir=TEMP_DIR)
+        os.close(fd)
+        try:
+            await asyncio.to_thread(_write_zip, zip_path, entries, errors)
+        except BaseException:
+            _safe_unlink(zip_path)
+            raise
+
+    finally:
+        for pdf_path in pdf_paths:
+            _safe_unlink(pdf_path)
+        for output_path, is_temp in outputs:
+            if is_temp:
+                _safe_unlink(output_path)
+
+    processing_time = round((time.monotonic_ns() - start_ns) / NS_PER_SECOND, 2)
+    logger.info("批次轉換完成：成功 %d、失敗 %d，總處理時間: %s 秒", len(entries), len(errors), processing_time)
+
+    return FileResponse(
+        zip_path,
+        media_type="application/zip",
+        filename="AST-B-reports.zip",
+        headers={"X-Processing-Time": str(processing_time)},
+        background=BackgroundTask(_safe_unlink, zip_path)
+    )
+
+
 @app.get("/api/schema-sample")
-async def get_schema_sample():
+async def get_schema_sample(request: Request):
     """
     取得 Schema 範例（用於開發與測試）
     """
-    schema = create_mock_schema()
-    return JSONResponse(content=schema.model_dump())
+    body, etag = _mock_schema_json()
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=3600"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @app.get("/api/template-info")
-async def get_template_info():
+async def get_template_info(request: Request):
     """
     取得模板資訊
     """
-    template_dir = os.path.join(os.path.dirname(__file__), "..", settings.template_dir)
+    template_dir = request.app.state.template_dir
 
-    if not os.path.exists(template_dir):
+    # 目錄於啟動時已建立；僅在執行期間被移除時才會失敗，不必每次先檢查是否存在
+    try:
+        template_files = list(_list_templates(template_dir))
+    except FileNotFoundError:
         return {
             "status": "error",
             "message": f"模板目錄不存在: {template_dir}"
         }
 
-    template_files = [
-        f for f in os.listdir(template_dir)
-        if f.endswith('.docx') and not f.startswith('~')
-    ]
-
     return {
         "status": "ok",
         "template_dir": template_dir,
@@ -767,14 +1154,19 @@ async def get_template_info():
 # ==============================================
 
 if __name__ == "__main__":
+    # 於專案根目錄執行：python -m backend.main
     import uvicorn
 
     # 取得 port（Zeabur 會設定 PORT 環境變數）
     port = int(os.environ.get("PORT", 8000))
 
+    # uvloop / httptools 由 uvicorn[standard] 提供；reload 模式僅支援單一 worker
     uvicorn.run(
-        "main:app",
+        "backend.main:app",
         host="0.0.0.0",
         port=port,
-        reload=settings.debug
+        reload=settings.debug,
+        loop="uvloop",
+        http="httptools",
+        workers=None if settings.debug else int(os.environ.get("WEB_CONCURRENCY", 1))
     )
@@ -8,45 +8,27 @@ CB 報告 → CNS 報告的統一 JSON Schema
 使用 Pydantic models 確保型別安全與資料驗證。
 """
 
-from pydantic import BaseModel, Field, field_validator
-from typing import List, Optional, Any
-from enum import Enum
+from dataclasses import dataclass
+
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, model_validator
+from typing import Annotated, Dict, List, Literal, Optional, Tuple, Any
 
 
 # ==============================================
-# Enums 列舉定義
+# 列舉值定義（Literal 別名：Pydantic 驗證時直接比對字串，不需建立 Enum 實例）
 # ==============================================
 
-class VerdictType(str, Enum):
-    """條文判定結果"""
-    PASS = "P"
-    FAIL = "F"
-    NOT_APPLICABLE = "N/A"
-    NOT_TESTED = "NT"
-    CONDITIONAL = "C"
-
-
-class ProductGroup(str, Enum):
-    """產品群組分類"""
-    AV = "AV"
-    ICT = "ICT"
-    AV_ICT = "Audio/Video & ICT"
-    TELECOM = "Telecom"
-    OTHER = "Other"
+# 條文判定結果：P（PASS）、F（FAIL）、N/A（NOT_APPLICABLE）、NT（NOT_TESTED）、C（CONDITIONAL）
+VerdictType = Literal["P", "F", "N/A", "NT", "C"]
 
+# 產品群組分類
+ProductGroup = Literal["AV", "ICT", "Audio/Video & ICT", "Telecom", "Other"]
 
-class SupplyConnection(str, Enum):
-    """電源連接方式"""
-    CLASS_I = "Class I"
-    CLASS_II = "Class II"
-    CLASS_III = "Class III"
+# 電源連接方式
+SupplyConnection = Literal["Class I", "Class II", "Class III"]
 
-
-class ClassificationOfUse(str, Enum):
-    """使用分類"""
-    ORDINARY = "Ordinary"
-    SKILLED = "Skilled"
-    INSTRUCTED = "Instructed"
+# 使用分類
+ClassificationOfUse = Literal["Ordinary", "Skilled", "Instructed"]
 
 
 # ==============================================
@@ -128,6 +110,16 @@ class BasicInfo(BaseModel):
     temperature_requirements_text: Optional[str] = Field(default=None, description="溫度/負載條件敘述，用於替換舊案33W段落")
 
 
+# TestItemParticulars 中 LLM 可能回傳數字或陣列、需統一轉為字串的欄位
+_TIP_STRING_FIELDS = (
+    'pollution_degree', 'ovc', 'ip_code', 'tma', 'mobility',
+    'installation_type', 'operating_conditions', 'mains_supply',
+    'rated_voltage', 'rated_frequency', 'rated_current',
+    'protection_class', 'insulation_type', 'additional_info',
+    'product_group'
+)
+
+
 class TestItemParticulars(BaseModel):
     """
     試驗樣品特性（Test Item Particulars）
@@ -174,19 +166,22 @@ class TestItemParticulars(BaseModel):
     additional_info: Optional[str] = Field(default=None, description="其他特性說明")
 
     # Validators 處理 LLM 回傳的非預期格式
-    @field_validator('pollution_degree', 'ovc', 'ip_code', 'tma', 'mobility',
-                     'installation_type', 'operating_conditions', 'mains_supply',
-                     'rated_voltage', 'rated_frequency', 'rated_current',
-                     'protection_class', 'insulation_type', 'additional_info',
-                     'product_group', mode='before')
+    @model_validator(mode='before')
     @classmethod
-    def convert_to_string(cls, v: Any) -> Optional[str]:
-        """將各種類型轉換為字串"""
-        if v is None:
-            return None
-        if isinstance(v, list):
-            return ', '.join(str(item) for item in v)
-        return str(v)
+    def convert_to_string(cls, data: Any) -> Any:
+        """將各種類型轉換為字串（一次處理所有文字欄位，不逐欄呼叫 validator）"""
+        if not isinstance(data, dict):
+            return data
+        converted = None
+        for key in _TIP_STRING_FIELDS:
+            v = data.get(key)
+            if v is None or isinstance(v, str):
+                continue
+            if converted is None:
+                # 不修改呼叫端傳入的 dict
+                converted = dict(data)
+            converted[key] = ', '.join(str(item) for item in v) if isinstance(v, list) else str(v)
+        return data if converted is None else converted
 
 
 class RevisionRecord(BaseModel):
@@ -232,41 +227,45 @@ class ClauseVerdict(BaseModel):
 
 # ==============================================
 # 關鍵測試表格的 Row 定義
+# （純資料列、筆數多：使用 slots dataclass，Pydantic 仍會在 KeyTables 驗證時檢查欄位型別）
 # ==============================================
 
-class InputTestRow(BaseModel):
+@dataclass(slots=True)
+class InputTestRow:
     """輸入測試表格的一行資料"""
-    test_condition: Optional[str] = Field(default=None, description="測試條件")
-    voltage: Optional[str] = Field(default=None, description="電壓")
-    current: Optional[str] = Field(default=None, description="電流")
-    power: Optional[str] = Field(default=None, description="功率")
-    frequency: Optional[str] = Field(default=None, description="頻率")
-    power_factor: Optional[str] = Field(default=None, description="功率因數")
-    remarks: Optional[str] = Field(default=None, description="備註")
+    test_condition: Annotated[Optional[str], Field(description="測試條件")] = None
+    voltage: Annotated[Optional[str], Field(description="電壓")] = None
+    current: Annotated[Optional[str], Field(description="電流")] = None
+    power: Annotated[Optional[str], Field(description="功率")] = None
+    frequency: Annotated[Optional[str], Field(description="頻率")] = None
+    power_factor: Annotated[Optional[str], Field(description="功率因數")] = None
+    remarks: Annotated[Optional[str], Field(description="備註")] = None
 
 
-class TemperatureRiseRow(BaseModel):
+@dataclass(slots=True)
+class TemperatureRiseRow:
     """溫升測試表格的一行資料"""
-    location: Optional[str] = Field(default=None, description="量測位置")
-    component: Optional[str] = Field(default=None, description="元件名稱")
-    measured_temp: Optional[str] = Field(default=None, description="量測溫度 (°C)")
-    ambient_temp: Optional[str] = Field(default=None, description="環境溫度 (°C)")
-    temp_rise: Optional[str] = Field(default=None, description="溫升 (K)")
-    limit: Optional[str] = Field(default=None, description="限值 (K)")
-    verdict: Optional[str] = Field(default=None, description="判定")
-    remarks: Optional[str] = Field(default=None, description="備註")
-
-
-class EnergySourceRow(BaseModel):
+    location: Annotated[Optional[str], Field(description="量測位置")] = None
+    component: Annotated[Optional[str], Field(description="元件名稱")] = None
+    measured_temp: Annotated[Optional[str], Field(description="量測溫度 (°C)")] = None
+    ambient_temp: Annotated[Optional[str], Field(description="環境溫度 (°C)")] = None
+    temp_rise: Annotated[Optional[str], Field(description="溫升 (K)")] = None
+    limit: Annotated[Optional[str], Field(description="限值 (K)")] = None
+    verdict: Annotated[Optional[str], Field(description="判定")] = None
+    remarks: Annotated[Optional[str], Field(description="備註")] = None
+
+
+@dataclass(slots=True)
+class EnergySourceRow:
     """能量來源表格的一行資料"""
-    energy_source: Optional[str] = Field(default=None, description="能量來源類型")
-    class_level: Optional[str] = Field(default=None, description="等級 (ES1/ES2/ES3)")
-    voltage: Optional[str] = Field(default=None, description="電壓")
-    current: Optional[str] = Field(default=None, description="電流")
-    power: Optional[str] = Field(default=None, description="功率")
-    location: Optional[str] = Field(default=None, description="位置")
-    safeguard: Optional[str] = Field(default=None, description="防護措施")
-    remarks: Optional[str] = Field(default=None, description="備註")
+    energy_source: Annotated[Optional[str], Field(description="能量來源類型")] = None
+    class_level: Annotated[Optional[str], Field(description="等級 (ES1/ES2/ES3)")] = None
+    voltage: Annotated[Optional[str], Field(description="電壓")] = None
+    current: Annotated[Optional[str], Field(description="電流")] = None
+    power: Annotated[Optional[str], Field(description="功率")] = None
+    location: Annotated[Optional[str], Field(description="位置")] = None
+    safeguard: Annotated[Optional[str], Field(description="防護措施")] = None
+    remarks: Annotated[Optional[str], Field(description="備註")] = None
 
 
 class FactoryInfo(BaseModel):
@@ -384,6 +383,33 @@ class CheckboxFlags(BaseModel):
 # 主 Schema：整合所有子區塊
 # ==============================================
 
+# API 文件用的範例資料（模組常數，不隨 model 設定重複建立）
+_REPORT_SCHEMA_EXAMPLE = {
+    "basic_info": {
+        "cb_report_no": "TW-12345-UL",
+        "standard": "IEC 62368-1:2018",
+        "applicant_en": "ABC Technology Co., Ltd.",
+        "manufacturer_en": "XYZ Manufacturing Inc.",
+        "product_name_en": "Power Adapter",
+        "model_main": "PA-120W",
+        "ratings_input": "100-240Vac, 50/60Hz, 2A",
+        "ratings_output": "12Vdc, 10A"
+    },
+    "series_models": [
+        {
+            "model": "PA-120W-A",
+            "vout": "12V",
+            "iout": "10A",
+            "pout": "120W"
+        }
+    ],
+    "translations": {
+        "applicant_zh": "ABC 科技股份有限公司",
+        "product_name_zh": "電源供應器"
+    }
+}
+
+
 class ReportSchema(BaseModel):
     """
     CB 報告完整 Schema
@@ -467,34 +493,13 @@ class ReportSchema(BaseModel):
         description="萃取過程備註"
     )
 
-    class Config:
-        """Pydantic 設定"""
-        json_schema_extra = {
-            "example": {
-                "basic_info": {
-                    "cb_report_no": "TW-12345-UL",
-                    "standard": "IEC 62368-1:2018",
-                    "applicant_en": "ABC Technology Co., Ltd.",
-                    "manufacturer_en": "XYZ Manufacturing Inc.",
-                    "product_name_en": "Power Adapter",
-                    "model_main": "PA-120W",
-                    "ratings_input": "100-240Vac, 50/60Hz, 2A",
-                    "ratings_output": "12Vdc, 10A"
-                },
-                "series_models": [
-                    {
-                        "model": "PA-120W-A",
-                        "vout": "12V",
-                        "iout": "10A",
-                        "pout": "120W"
-                    }
-                ],
-                "translations": {
-                    "applicant_zh": "ABC 科技股份有限公司",
-                    "product_name_zh": "電源供應器"
-                }
-            }
-        }
+    # 合併用索引（清單, 鍵 → 位置），由 merge_schemas 維護，不參與序列化
+    _series_models_index: Optional[Tuple[list, Dict[str, int]]] = PrivateAttr(default=None)
+    _clause_verdicts_index: Optional[Tuple[list, Dict[str, int]]] = PrivateAttr(default=None)
+    # 工廠清單的 (name, address) 去重鍵集合（清單, 鍵集合）
+    _factory_keys: Optional[Tuple[list, set]] = PrivateAttr(default=None)
+
+    model_config = ConfigDict(json_schema_extra={"example": _REPORT_SCHEMA_EXAMPLE})
 
 
 # ==============================================
@@ -502,8 +507,79 @@ class ReportSchema(BaseModel):
 # ==============================================
 
 def create_empty_schema() -> ReportSchema:
-    """建立一個空的 ReportSchema 物件"""
-    return ReportSchema()
+    """
+    建立一個空的 ReportSchema 物件
+
+    僅套用欄位預設值，以 model_construct 略過驗證流程
+    """
+    return ReportSchema.model_construct()
+
+
+def _indexed_list(schema: ReportSchema, field: str, key_attr: str) -> Tuple[list, Dict[str, int]]:
+    """
+    取得清單欄位與其「鍵 → 位置」索引，供合併時 O(1) 查詢
+
+    索引存放於 ReportSchema 私有屬性，隨 model_copy 一併複製，連續合併時不必每次重建；
+    清單物件被替換或長度與索引不符（其他流程直接修改過清單）時才重新建立。
+    重建時的去重規則與 dict 相同：同鍵保留第一筆的位置、最後一筆的內容
+
+    Args:
+        schema: 要合併的 ReportSchema
+        field: 清單欄位名稱
+        key_attr: 作為鍵的元素屬性
+
+    Returns:
+        (清單, 鍵 → 位置索引)
+    """
+    items = getattr(schema, field)
+    index_attr = f"_{field}_index"
+    cached = getattr(schema, index_attr)
+    if cached is not None and cached[0] is items and len(cached[1]) == len(items):
+        return cached
+
+    unique = {}
+    for item in items:
+        unique[getattr(item, key_attr)] = item
+    if len(unique) != len(items):
+        items = list(unique.values())
+        setattr(schema, field, items)
+
+    cached = (items, {key: pos for pos, key in enumerate(unique)})
+    setattr(schema, index_attr, cached)
+    return cached
+
+
+def _copy_indexed_list(src: ReportSchema, dst: ReportSchema, field: str) -> None:
+    """
+    複製清單欄位到 dst（淺拷貝）
+
+    src 的索引仍有效時一併複製（dict.copy 不必重新走訪元素），否則留待 _indexed_list 重建
+    """
+    items = getattr(src, field)
+    copied = list(items)
+    setattr(dst, field, copied)
+    cached = getattr(src, f"_{field}_index")
+    if cached is not None and cached[0] is items:
+        setattr(dst, f"_{field}_index", (copied, cached[1].copy()))
+
+
+def _copy_factories(schema: ReportSchema) -> Tuple[list, set]:
+    """
+    將 schema 的工廠清單換成副本，並取得對應的 (name, address) 鍵集合
+
+    鍵集合存放於私有屬性並隨 model_copy 傳遞，仍對應目前清單時以 set.copy 複製，
+    不必每次合併都從清單重新建立
+    """
+    factories = schema.factories
+    cached = schema._factory_keys
+    if cached is not None and cached[0] is factories:
+        keys = cached[1].copy()
+    else:
+        keys = {(f.name, f.address) for f in factories}
+    copied = list(factories)
+    schema.factories = copied
+    schema._factory_keys = (copied, keys)
+    return copied, keys
 
 
 def merge_schemas(base: ReportSchema, update: ReportSchema) -> ReportSchema:
@@ -517,83 +593,102 @@ def merge_schemas(base: ReportSchema, update: ReportSchema) -> ReportSchema:
     - key_tables: 累加
     - translations: 取 update 中非空的欄位覆蓋 base
     - checkbox_flags: OR 運算（任一為 True 則為 True）
+
+    兩側皆為已驗證的 ReportSchema，合併過程不再重新驗證；
+    LLM 原始輸出須先經 _dict_to_schema 等入口建構為 model 後才能傳入
     """
-    merged = base.model_copy(deep=True)
+    # 淺拷貝：只複製本函式會就地修改的子 model 與清單，清單元素與其餘欄位皆與 base 共用
+    merged = base.model_copy()
+    merged.basic_info = base.basic_info.model_copy()
+    merged.test_item_particulars = base.test_item_particulars.model_copy()
+    merged.translations = base.translations.model_copy()
+    merged.checkbox_flags = base.checkbox_flags.model_copy()
+    merged.key_tables = base.key_tables.model_copy()
+    _copy_indexed_list(base, merged, "series_models")
+    _copy_indexed_list(base, merged, "clause_verdicts")
+
+    # 子區塊皆直接就地覆寫欄位：merged 為 base 的副本，且兩側資料都來自已驗證的 model，
+    # 不需 model_dump() 後重新建構（避免每次合併都重跑整個驗證流程）
 
     # 合併 basic_info
-    base_dict = merged.basic_info.model_dump()
-    update_dict = update.basic_info.model_dump()
-    for key, value in update_dict.items():
+    basic_info = merged.basic_info
+    for key, value in update.basic_info.__dict__.items():
         if value is not None and value != "":
-            base_dict[key] = value
-    merged.basic_info = BasicInfo(**base_dict)
+            setattr(basic_info, key, value)
 
     # 合併 test_item_particulars
-    base_tip = merged.test_item_particulars.model_dump()
-    update_tip = update.test_item_particulars.model_dump()
-    for key, value in update_tip.items():
+    tip = merged.test_item_particulars
+    for key, value in update.test_item_particulars.__dict__.items():
         if value is not None and value != "" and value != []:
             if isinstance(value, list):
-                # List 欄位做合併
-                existing = base_tip.get(key, [])
-                base_tip[key] = list(set(existing + value))
+                # List 欄位做聯集（保留出現順序，填入 Word 時結果才固定）
+                setattr(tip, key, list(dict.fromkeys(getattr(tip, key) + value)))
             else:
-                base_tip[key] = value
-    merged.test_item_particulars = TestItemParticulars(**base_tip)
+                setattr(tip, key, value)
 
     # 合併 series_models（以 model 名稱去重）
-    existing_models = {m.model: m for m in merged.series_models}
+    series_models, model_index = _indexed_list(merged, "series_models", "model")
     for model in update.series_models:
-        if model.model and model.model not in existing_models:
-            existing_models[model.model] = model
-    merged.series_models = list(existing_models.values())
+        if model.model and model.model not in model_index:
+            model_index[model.model] = len(series_models)
+            series_models.append(model)
 
-    # 合併 clause_verdicts（以 clause 為 key）
-    existing_clauses = {c.clause: c for c in merged.clause_verdicts}
+    # 合併 clause_verdicts（以 clause 為 key，後者覆蓋前者並保留原位置）
+    clause_verdicts, clause_index = _indexed_list(merged, "clause_verdicts", "clause")
     for verdict in update.clause_verdicts:
         if verdict.clause:
-            existing_clauses[verdict.clause] = verdict
-    merged.clause_verdicts = list(existing_clauses.values())
+            pos = clause_index.get(verdict.clause)
+            if pos is None:
+                clause_index[verdict.clause] = len(clause_verdicts)
+                clause_verdicts.append(verdict)
+            else:
+                clause_verdicts[pos] = verdict
 
     # 合併 key_tables
-    merged.key_tables.input_tests.extend(update.key_tables.input_tests)
-    merged.key_tables.temperature_rise.extend(update.key_tables.temperature_rise)
-    merged.key_tables.energy_sources.extend(update.key_tables.energy_sources)
+    key_tables = merged.key_tables
+    if update.key_tables.input_tests:
+        key_tables.input_tests = key_tables.input_tests + update.key_tables.input_tests
+    if update.key_tables.temperature_rise:
+        key_tables.temperature_rise = key_tables.temperature_rise + update.key_tables.temperature_rise
+    if update.key_tables.energy_sources:
+        key_tables.energy_sources = key_tables.energy_sources + update.key_tables.energy_sources
     if update.key_tables.input_test_raw:
-        merged.key_tables.input_test_raw = update.key_tables.input_test_raw
+        key_tables.input_test_raw = update.key_tables.input_test_raw
     if update.key_tables.abnormal_fault_raw:
-        merged.key_tables.abnormal_fault_raw = update.key_tables.abnormal_fault_raw
+        key_tables.abnormal_fault_raw = update.key_tables.abnormal_fault_raw
 
     # 合併 translations
-    base_trans = merged.translations.model_dump()
-    update_trans = update.translations.model_dump()
-    for key, value in update_trans.items():
+    translations = merged.translations
+    for key, value in update.translations.__dict__.items():
         if value is not None and value != "":
-            base_trans[key] = value
-    merged.translations = Translations(**base_trans)
+            setattr(translations, key, value)
 
-    # 合併 checkbox_flags（OR 運算）
-    base_flags = merged.checkbox_flags.model_dump()
-    update_flags = update.checkbox_flags.model_dump()
-    for key, value in update_flags.items():
-        if value:  # 如果 update 中為 True
-            base_flags[key] = True
-    merged.checkbox_flags = CheckboxFlags(**base_flags)
+    # 合併 checkbox_flags（OR 運算：僅將 update 中為 True 的旗標一次寫入）
+    # 欄位皆為 bool，直接更新 __dict__ 省去逐欄經過 BaseModel.__setattr__
+    true_flags = [key for key, value in update.checkbox_flags.__dict__.items() if value]
+    if true_flags:
+        flags = merged.checkbox_flags
+        flags.__dict__.update(dict.fromkeys(true_flags, True))
+        flags.__pydantic_fields_set__.update(true_flags)
 
     # 合併工廠清單（按 name/address 去重）
     if update.factories:
-        existing = {(f.name, f.address) for f in merged.factories}
+        factories, existing = _copy_factories(merged)
         for f in update.factories:
             key = (f.name, f.address)
             if key not in existing:
-                merged.factories.append(f)
+                factories.append(f)
                 existing.add(key)
 
     # 合併附件
     if update.attachments:
         if merged.attachments:
-            merged.attachments = list(dict.fromkeys(merged.attachments + update.attachments))
+            # 僅在有新附件時才建立新清單（merged 與 base 共用清單，不可就地 extend）
+            seen = set(merged.attachments)
+            added = [a for a in update.attachments if not (a in seen or seen.add(a))]
+            if added:
+                merged.attachments = merged.attachments + added
         else:
-            merged.attachments = update.attachments
+            merged.attachments = list(dict.fromkeys(update.attachments))
 
     return merged
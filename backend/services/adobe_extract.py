@@ -12,19 +12,22 @@ Adobe PDF Extract Service
 """
 
 import httpx
-import json
+import aiofiles
+import asyncio
+import orjson
+import random
 import time
 import zipfile
-import io
-from typing import Optional
+from typing import IO, Optional, Tuple
 from tenacity import retry, stop_after_attempt, wait_exponential
 
-import sys
 import os
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import shutil
+import subprocess
+import tempfile
 
-from config import settings
-from utils.logger import get_logger
+from ..config import settings
+from ..utils.logger import get_logger
 
 logger = get_logger(__name__)
 
@@ -40,6 +43,23 @@ ADOBE_IMS_TOKEN_URL = "https://ims-na1.adobelogin.com/ims/token/v3"
 ADOBE_PDF_SERVICES_BASE = settings.adobe_pdf_services_base_url
 
 
+# 輪詢間隔：由短間隔開始指數成長至上限，並加入 ±20% 抖動，
+# 短作業能更快偵測完成，長作業減少查詢次數，多個作業同時輪詢時也不會同步打到 API
+POLL_INTERVAL_INITIAL = 0.5
+POLL_INTERVAL_MAX = 10.0
+POLL_BACKOFF_FACTOR = 1.6
+POLL_JITTER = 0.2
+
+# 下載結果暫存於記憶體的上限，超過時改寫入磁碟暫存檔
+RESULT_SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+
+# HTTP 逾時設定：連線 / 等待連線池逾時較短，壅塞或主機無法連線時快速失敗；
+# 個別請求只調整讀寫逾時，保留相同的連線逾時
+ADOBE_TIMEOUT = httpx.Timeout(60.0, connect=10.0, pool=5.0)
+ADOBE_SHORT_TIMEOUT = httpx.Timeout(30.0, connect=10.0, pool=5.0)  # token / 狀態查詢
+ADOBE_TRANSFER_TIMEOUT = httpx.Timeout(120.0, connect=10.0, pool=5.0)  # PDF 上傳 / 結果下載
+
+
 class AdobeExtractError(Exception):
     """Adobe PDF Extract 相關錯誤"""
     pass
@@ -58,67 +78,98 @@ class AdobeTokenManager:
     def __init__(self):
         self._token: Optional[str] = None
         self._token_expires_at: float = 0
+        # 序列化 token 更新：多個請求同時發現 token 過期時只向 IMS 請求一次
+        self._lock = asyncio.Lock()
 
-    async def get_access_token(self) -> str:
+    def _valid_token(self) -> Optional[str]:
+        """token 還有效（預留 60 秒緩衝）時回傳，否則回傳 None"""
+        if self._token and time.time() < (self._token_expires_at - 60):
+            return self._token
+        return None
+
+    async def get_access_token(self, client: httpx.AsyncClient) -> str:
         """
         取得有效的 access token
         如果 token 即將過期或不存在，自動取得新 token
         """
-        current_time = time.time()
-
-        # 如果 token 還有效（預留 60 秒緩衝），直接回傳
-        if self._token and current_time < (self._token_expires_at - 60):
+        # 如果 token 還有效，直接回傳（不需取得 lock）
+        token = self._valid_token()
+        if token:
+            return token
+
+        async with self._lock:
+            # 等待 lock 期間可能已由其他請求更新完成
+            token = self._valid_token()
+            if token:
+                return token
+
+            # 取得新 token
+            await self._refresh_token(client)
             return self._token
 
-        # 取得新 token
-        await self._refresh_token()
-        return self._token
-
-    async def _refresh_token(self):
+    async def _refresh_token(self, client: httpx.AsyncClient):
         """
         從 Adobe IMS 取得新的 access token
         """
         logger.info("正在取得 Adobe API access token...")
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    ADOBE_IMS_TOKEN_URL,
-                    data={
-                        "grant_type": "client_credentials",
-                        "client_id": settings.adobe_client_id,
-                        "client_secret": settings.adobe_client_secret,
-                        "scope": "openid,AdobeID,read_organizations"
-                    },
-                    headers={
-                        "Content-Type": "application/x-www-form-urlencoded"
-                    },
-                    timeout=30.0
-                )
+        try:
+            response = await client.post(
+                ADOBE_IMS_TOKEN_URL,
+                data={
+                    "grant_type": "client_credentials",
+                    "client_id": settings.adobe_client_id,
+                    "client_secret": settings.adobe_client_secret,
+                    "scope": "openid,AdobeID,read_organizations"
+                },
+                headers={
+                    "Content-Type": "application/x-www-form-urlencoded"
+                },
+                timeout=ADOBE_SHORT_TIMEOUT
+            )
 
-                if response.status_code != 200:
-                    error_msg = f"取得 Adobe token 失敗: {response.status_code} - {response.text}"
-                    logger.error(error_msg)
-                    raise AdobeExtractError(error_msg)
+            if response.status_code != 200:
+                error_msg = f"取得 Adobe token 失敗: {response.status_code} - {response.text}"
+                logger.error(error_msg)
+                raise AdobeExtractError(error_msg)
 
-                token_data = response.json()
-                self._token = token_data.get("access_token")
-                # Adobe token 通常有效期為 24 小時（86400 秒）
-                expires_in = token_data.get("expires_in", 86400)
-                self._token_expires_at = time.time() + expires_in
+            token_data = response.json()
+            self._token = token_data.get("access_token")
+            # Adobe token 通常有效期為 24 小時（86400 秒）
+            expires_in = token_data.get("expires_in", 86400)
+            self._token_expires_at = time.time() + expires_in
 
-                logger.info(f"成功取得 Adobe token，有效期 {expires_in} 秒")
+            logger.info(f"成功取得 Adobe token，有效期 {expires_in} 秒")
 
-            except httpx.RequestError as e:
-                error_msg = f"連接 Adobe IMS 時發生錯誤: {str(e)}"
-                logger.error(error_msg)
-                raise AdobeExtractError(error_msg)
+        except httpx.RequestError as e:
+            error_msg = f"連接 Adobe IMS 時發生錯誤: {str(e)}"
+            logger.error(error_msg)
+            raise AdobeExtractError(error_msg)
 
 
 # 全域 token manager
 _token_manager = AdobeTokenManager()
 
 
+# ==============================================
+# HTTP Client
+# ==============================================
+
+def create_adobe_client() -> httpx.AsyncClient:
+    """
+    建立呼叫 Adobe API 用的 HTTP client
+
+    由 app lifespan 建立一次並重複使用，讓 IMS / PDF Services / 下載請求
+    共用 keep-alive 連線，避免每次請求重新建立 TLS 連線；
+    啟用 HTTP/2 讓並行的輪詢請求在同一條連線上多工（不支援的主機自動退回 HTTP/1.1）
+    """
+    return httpx.AsyncClient(
+        http2=True,
+        timeout=ADOBE_TIMEOUT,
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=40, keepalive_expiry=15.0)
+    )
+
+
 # ==============================================
 # PDF Extract Functions
 # ==============================================
@@ -127,118 +178,130 @@ _token_manager = AdobeTokenManager()
     stop=stop_after_attempt(3),
     wait=wait_exponential(multiplier=1, min=2, max=10)
 )
-async def _upload_pdf_and_create_job(pdf_bytes: bytes, access_token: str) -> str:
+async def _upload_pdf_and_create_job(
+    client: httpx.AsyncClient,
+    pdf_path: str,
+    access_token: str
+) -> str:
     """
     Step 1: 上傳 PDF 並建立 Extract 作業
 
     Args:
-        pdf_bytes: PDF 檔案的 bytes
+        client: 共用的 HTTP client
+        pdf_path: PDF 檔案路徑（上傳時直接從檔案串流讀取）
         access_token: Adobe API access token
 
     Returns:
         job_id: 作業 ID，用於後續查詢狀態
     """
-    logger.info(f"正在上傳 PDF（{len(pdf_bytes)} bytes）並建立 Extract 作業...")
+    pdf_size = os.path.getsize(pdf_path)
+    logger.info(f"正在上傳 PDF（{pdf_size} bytes）並建立 Extract 作業...")
+
+    # Step 1a: 取得 upload presigned URL
+    # 參考: https://developer.adobe.com/document-services/docs/apis/#tag/PDF-Extract
+    create_job_url = f"{ADOBE_PDF_SERVICES_BASE}/operation/extractpdf"
+
+    headers = {
+        "Authorization": f"Bearer {access_token}",
+        "x-api-key": settings.adobe_client_id,
+        "Content-Type": "application/json"
+    }
+
+    # 建立 Extract 作業的 payload
+    # 包含要萃取的元素類型
+    job_payload = {
+        "elementsToExtract": ["text", "tables"],
+        "tableOutputFormat": "csv",  # 或 "xlsx"
+        "renditionsToExtract": [],  # 可選：萃取圖片
+        "notifiers": []
+    }
 
-    async with httpx.AsyncClient() as client:
-        # Step 1a: 取得 upload presigned URL
-        # 參考: https://developer.adobe.com/document-services/docs/apis/#tag/PDF-Extract
-        create_job_url = f"{ADOBE_PDF_SERVICES_BASE}/operation/extractpdf"
+    # 首先需要上傳 PDF 到 Adobe 的 asset 服務
+    # Step 1a: 建立 asset
+    asset_url = f"{ADOBE_PDF_SERVICES_BASE}/assets"
 
-        headers = {
+    asset_response = await client.post(
+        asset_url,
+        headers={
             "Authorization": f"Bearer {access_token}",
             "x-api-key": settings.adobe_client_id,
             "Content-Type": "application/json"
+        },
+        json={
+            "mediaType": "application/pdf"
         }
+    )
 
-        # 建立 Extract 作業的 payload
-        # 包含要萃取的元素類型
-        job_payload = {
-            "elementsToExtract": ["text", "tables"],
-            "tableOutputFormat": "csv",  # 或 "xlsx"
-            "renditionsToExtract": [],  # 可選：萃取圖片
-            "notifiers": []
-        }
-
-        # 首先需要上傳 PDF 到 Adobe 的 asset 服務
-        # Step 1a: 建立 asset
-        asset_url = f"{ADOBE_PDF_SERVICES_BASE}/assets"
-
-        asset_response = await client.post(
-            asset_url,
-            headers={
-                "Authorization": f"Bearer {access_token}",
-                "x-api-key": settings.adobe_client_id,
-                "Content-Type": "application/json"
-            },
-            json={
-                "mediaType": "application/pdf"
-            },
-            timeout=60.0
+    if asset_response.status_code not in [200, 201]:
+        raise AdobeExtractError(
+            f"建立 asset 失敗: {asset_response.status_code} - {asset_response.text}"
         )
 
-        if asset_response.status_code not in [200, 201]:
-            raise AdobeExtractError(
-                f"建立 asset 失敗: {asset_response.status_code} - {asset_response.text}"
-            )
-
-        asset_data = asset_response.json()
-        upload_uri = asset_data.get("uploadUri")
-        asset_id = asset_data.get("assetID")
-
-        logger.info(f"已建立 asset，ID: {asset_id}")
+    asset_data = asset_response.json()
+    upload_uri = asset_data.get("uploadUri")
+    asset_id = asset_data.get("assetID")
+
+    logger.info(f"已建立 asset，ID: {asset_id}")
+
+    # Step 1b: 上傳 PDF 到 presigned URL
+    # 從檔案分塊串流上傳，不需先將整份 PDF 載入記憶體；
+    # presigned URL 不接受 chunked transfer，需明確提供 Content-Length
+    upload_response = await client.put(
+        upload_uri,
+        content=_iter_file(pdf_path),
+        headers={
+            "Content-Type": "application/pdf",
+            "Content-Length": str(pdf_size)
+        },
+        timeout=ADOBE_TRANSFER_TIMEOUT
+    )
 
-        # Step 1b: 上傳 PDF 到 presigned URL
-        upload_response = await client.put(
-            upload_uri,
-            content=pdf_bytes,
-            headers={
-                "Content-Type": "application/pdf"
-            },
-            timeout=120.0
+    if upload_response.status_code not in [200, 201]:
+        raise AdobeExtractError(
+            f"上傳 PDF 失敗: {upload_response.status_code} - {upload_response.text}"
         )
 
-        if upload_response.status_code not in [200, 201]:
-            raise AdobeExtractError(
-                f"上傳 PDF 失敗: {upload_response.status_code} - {upload_response.text}"
-            )
+    logger.info("PDF 上傳成功")
 
-        logger.info("PDF 上傳成功")
+    # Step 1c: 使用 asset ID 建立 Extract 作業
+    extract_response = await client.post(
+        create_job_url,
+        headers=headers,
+        json={
+            "assetID": asset_id,
+            "elementsToExtract": ["text", "tables"],
+            "tableOutputFormat": "csv"
+        }
+    )
 
-        # Step 1c: 使用 asset ID 建立 Extract 作業
-        extract_response = await client.post(
-            create_job_url,
-            headers=headers,
-            json={
-                "assetID": asset_id,
-                "elementsToExtract": ["text", "tables"],
-                "tableOutputFormat": "csv"
-            },
-            timeout=60.0
+    if extract_response.status_code not in [200, 201]:
+        raise AdobeExtractError(
+            f"建立 Extract 作業失敗: {extract_response.status_code} - {extract_response.text}"
         )
 
-        if extract_response.status_code not in [200, 201]:
-            raise AdobeExtractError(
-                f"建立 Extract 作業失敗: {extract_response.status_code} - {extract_response.text}"
-            )
-
-        # 從 response header 取得 job location
-        job_location = extract_response.headers.get("x-request-id") or extract_response.headers.get("location")
+    # 從 response header 取得 job location
+    job_location = extract_response.headers.get("x-request-id") or extract_response.headers.get("location")
 
-        # 或從 response body 取得
-        job_data = extract_response.json() if extract_response.text else {}
-        job_id = job_data.get("jobId") or job_location
+    # 或從 response body 取得
+    job_data = extract_response.json() if extract_response.text else {}
+    job_id = job_data.get("jobId") or job_location
 
-        logger.info(f"Extract 作業已建立，Job ID: {job_id}")
+    logger.info(f"Extract 作業已建立，Job ID: {job_id}")
 
-        return job_id
+    return job_id
 
 
-async def _poll_job_status(job_id: str, access_token: str, max_wait_seconds: int = 300) -> dict:
+async def _poll_job_status(
+    client: httpx.AsyncClient,
+    job_id: str,
+    access_token: str,
+    max_wait_seconds: int = 300
+) -> dict:
     """
     Step 2: 輪詢作業狀態直到完成
 
     Args:
+        client: 共用的 HTTP client
         job_id: 作業 ID
         access_token: Adobe API access token
         max_wait_seconds: 最大等待秒數
@@ -255,49 +318,48 @@ async def _poll_job_status(job_id: str, access_token: str, max_wait_seconds: int
         "x-api-key": settings.adobe_client_id
     }
 
-    start_time = time.time()
-    poll_interval = 3  # 每 3 秒檢查一次
-
-    async with httpx.AsyncClient() as client:
-        while True:
-            elapsed = time.time() - start_time
-            if elapsed > max_wait_seconds:
-                raise AdobeExtractError(f"Extract 作業逾時（已等待 {max_wait_seconds} 秒）")
+    start_time = time.monotonic()
+    poll_interval = POLL_INTERVAL_INITIAL
 
-            try:
-                response = await client.get(status_url, headers=headers, timeout=30.0)
-
-                if response.status_code == 200:
-                    status_data = response.json()
-                    status = status_data.get("status", "").lower()
+    while True:
+        elapsed = time.monotonic() - start_time
+        if elapsed > max_wait_seconds:
+            raise AdobeExtractError(f"Extract 作業逾時（已等待 {max_wait_seconds} 秒）")
 
-                    if status == "done" or status == "succeeded":
-                        logger.info("Extract 作業完成")
-                        return status_data
+        try:
+            response = await client.get(status_url, headers=headers, timeout=ADOBE_SHORT_TIMEOUT)
 
-                    elif status in ["failed", "error"]:
-                        error_msg = status_data.get("error", {}).get("message", "未知錯誤")
-                        raise AdobeExtractError(f"Extract 作業失敗: {error_msg}")
+            if response.status_code == 200:
+                status_data = response.json()
+                status = status_data.get("status", "").lower()
 
-                    elif status in ["in progress", "running", "pending"]:
-                        logger.debug(f"作業進行中... ({elapsed:.0f}s)")
+                if status == "done" or status == "succeeded":
+                    logger.info("Extract 作業完成")
+                    return status_data
 
-                    else:
-                        logger.warning(f"未知狀態: {status}")
+                elif status in ["failed", "error"]:
+                    error_msg = status_data.get("error", {}).get("message", "未知錯誤")
+                    raise AdobeExtractError(f"Extract 作業失敗: {error_msg}")
 
-            except httpx.RequestError as e:
-                logger.warning(f"輪詢時發生連接錯誤: {e}")
+                elif status in ["in progress", "running", "pending"]:
+                    logger.debug("作業進行中... (%.0fs)", elapsed)
 
-            await asyncio_sleep(poll_interval)
+                else:
+                    logger.warning(f"未知狀態: {status}")
 
+        except httpx.RequestError as e:
+            logger.warning(f"輪詢時發生連接錯誤: {e}")
 
-async def asyncio_sleep(seconds: float):
-    """非同步 sleep"""
-    import asyncio
-    await asyncio.sleep(seconds)
+        delay = poll_interval * random.uniform(1 - POLL_JITTER, 1 + POLL_JITTER)
+        await asyncio.sleep(min(delay, max(0.0, max_wait_seconds - elapsed)))
+        poll_interval = min(POLL_INTERVAL_MAX, poll_interval * POLL_BACKOFF_FACTOR)
 
 
-async def _download_and_parse_result(result_data: dict, access_token: str) -> dict:
+async def _download_and_parse_result(
+    client: httpx.AsyncClient,
+    result_data: dict,
+    access_token: str
+) -> dict:
     """
     Step 3: 下載並解析 Extract 結果
 
@@ -306,6 +368,7 @@ async def _download_and_parse_result(result_data: dict, access_token: str) -> di
     - 可能的 CSV 檔案: 各個表格的原始資料
 
     Args:
+        client: 共用的 HTTP client
         result_data: 完成的作業資訊
         access_token: Adobe API access token
 
@@ -323,44 +386,63 @@ async def _download_and_parse_result(result_data: dict, access_token: str) -> di
     if not download_uri:
         raise AdobeExtractError("無法取得結果下載 URL")
 
-    async with httpx.AsyncClient() as client:
-        # 注意：Adobe 回傳的 downloadUri 是 presigned URL（已含簽名）
-        # 不需要加 Authorization header，否則會衝突
-        response = await client.get(
-            download_uri,
-            timeout=120.0
-        )
+    # 注意：Adobe 回傳的 downloadUri 是 presigned URL（已含簽名）
+    # 不需要加 Authorization header，否則會衝突
+    # 以串流方式寫入暫存檔（小結果留在記憶體，超過上限才落地），不一次將整個 ZIP 載入記憶體
+    with tempfile.SpooledTemporaryFile(max_size=RESULT_SPOOL_MAX_MEMORY) as spool:
+        async with client.stream("GET", download_uri, timeout=ADOBE_TRANSFER_TIMEOUT) as response:
+            if response.status_code != 200:
+                await response.aread()
+                raise AdobeExtractError(
+                    f"下載結果失敗: {response.status_code} - {response.text}"
+                )
 
-        if response.status_code != 200:
-            raise AdobeExtractError(
-                f"下載結果失敗: {response.status_code} - {response.text}"
-            )
+            content_type = response.headers.get("content-type", "")
+            async for chunk in response.aiter_bytes(UPLOAD_CHUNK_SIZE):
+                spool.write(chunk)
+
+        spool.seek(0)
+        # 解壓縮與 JSON 解析為 CPU 工作，移至 thread 執行避免阻塞 event loop
+        return await asyncio.to_thread(_parse_extract_result, spool, content_type)
 
-        content = response.content
-        content_type = response.headers.get("content-type", "")
-
-        # 檢查回傳格式：可能是 ZIP 或 JSON
-        if content_type.startswith("application/json") or content.startswith(b'{'):
-            # 直接是 JSON 格式
-            logger.info("收到 JSON 格式結果")
-            structured_data = json.loads(content)
-            raw_text = _extract_text_from_structured_data(structured_data)
-            return {
-                "structured_data": structured_data,
-                "tables": [],
-                "raw_text": raw_text
-            }
-        else:
-            # 解析 ZIP 檔案
-            return _parse_extract_zip(content)
 
+def _parse_extract_result(result_file: IO[bytes], content_type: str) -> dict:
+    """
+    解析下載的 Extract 結果（可能是 ZIP 或 JSON）
+
+    Args:
+        result_file: 已下載的結果檔案（位置在開頭）
+        content_type: 回應的 Content-Type
 
-def _parse_extract_zip(zip_content: bytes) -> dict:
+    Returns:
+        解析後的結構化資料
+    """
+    # 檢查回傳格式：可能是 ZIP 或 JSON
+    is_json = content_type.startswith("application/json") or result_file.read(1) == b'{'
+    result_file.seek(0)
+
+    if is_json:
+        # 直接是 JSON 格式
+        logger.info("收到 JSON 格式結果")
+        structured_data = orjson.loads(result_file.read())
+        raw_text, elements_by_page = _index_structured_data(structured_data)
+        return {
+            "structured_data": structured_data,
+            "tables": [],
+            "raw_text": raw_text,
+            "elements_by_page": elements_by_page
+        }
+    else:
+        # 解析 ZIP 檔案
+        return _parse_extract_zip(result_file)
+
+
+def _parse_extract_zip(zip_file: IO[bytes]) -> dict:
     """
     解析 Adobe Extract 回傳的 ZIP 檔案
 
     Args:
-        zip_content: ZIP 檔案的 bytes
+        zip_file: ZIP 檔案（可 seek 的檔案物件）
 
     Returns:
         解析後的結構化資料
@@ -372,7 +454,7 @@ def _parse_extract_zip(zip_content: bytes) -> dict:
     }
 
     try:
-        with zipfile.ZipFile(io.BytesIO(zip_content), 'r') as zip_ref:
+        with zipfile.ZipFile(zip_file, 'r') as zip_ref:
             file_list = zip_ref.namelist()
             logger.info(f"ZIP 內含檔案: {file_list}")
 
@@ -380,7 +462,7 @@ def _parse_extract_zip(zip_content: bytes) -> dict:
             for filename in file_list:
                 if filename.endswith("structuredData.json"):
                     with zip_ref.open(filename) as f:
-                        result["structured_data"] = json.load(f)
+                        result["structured_data"] = orjson.loads(f.read())
                         logger.info("成功解析 structuredData.json")
 
                 # 讀取表格 CSV
@@ -397,96 +479,111 @@ def _parse_extract_zip(zip_content: bytes) -> dict:
         logger.error(f"ZIP 檔案格式錯誤: {e}")
         raise AdobeExtractError(f"無法解析 ZIP 檔案: {e}")
 
-    # 從 structured_data 中提取純文字
+    # 從 structured_data 中提取純文字並依頁分組元素
     if result["structured_data"]:
-        result["raw_text"] = _extract_text_from_structured_data(result["structured_data"])
+        result["raw_text"], result["elements_by_page"] = _index_structured_data(result["structured_data"])
 
     return result
 
 
-def _extract_text_from_structured_data(structured_data: dict) -> str:
+def _index_structured_data(structured_data: dict) -> Tuple[str, dict]:
     """
-    從 Adobe 的 structuredData.json 中提取純文字
+    單次走訪 Adobe 的 structuredData.json，同時提取純文字與依頁碼分組的元素
 
     Adobe Extract 的 structured data 格式包含 elements 陣列，
-    每個 element 有 Text 屬性包含該區塊的文字
+    每個 element 有 Text 屬性包含該區塊的文字，通常也有 Page 屬性
+
+    Args:
+        structured_data: Adobe Extract 的原始結構化資料
+
+    Returns:
+        (純文字, 以頁碼為 key 的元素分組)
     """
     text_parts = []
+    pages = {}
 
-    elements = structured_data.get("elements", [])
-
-    for element in elements:
-        # 提取文字內容
+    for element in structured_data.get("elements", []):
         text = element.get("Text", "")
         if text:
             text_parts.append(text)
 
-    return "\n".join(text_parts)
+        # Adobe Extract 的 element 通常有 Page 屬性
+        page_num = element.get("Page", 0)
+        page = pages.get(page_num)
+        if page is None:
+            page = pages[page_num] = {
+                "texts": [],
+                "tables": []
+            }
+
+        # 判斷是文字還是表格
+        if element.get("Table"):
+            page["tables"].append(element)
+        elif text:
+            page["texts"].append(element)
+
+    return "\n".join(text_parts), pages
 
 
 # ==============================================
 # Main Export Function
 # ==============================================
 
-def _try_unlock_pdf(pdf_bytes: bytes) -> bytes:
+# 上傳 PDF 時每次讀取的區塊大小（1 MiB）
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+
+async def _iter_file(path: str, chunk_size: int = UPLOAD_CHUNK_SIZE):
+    """以非同步方式分塊讀取檔案，作為 httpx 串流上傳的 content"""
+    async with aiofiles.open(path, "rb") as f:
+        while chunk := await f.read(chunk_size):
+            yield chunk
+
+
+def _try_unlock_pdf(pdf_path: str) -> str:
     """
     嘗試使用 qpdf 移除 PDF 權限限制
-    如果 qpdf 不可用或失敗，回傳原始 bytes
+    如果 qpdf 不可用或失敗，回傳原始路徑；成功則回傳解鎖後的暫存檔路徑
     """
-    import subprocess
-    import tempfile
-
     try:
-        # 檢查 qpdf 是否可用
-        result = subprocess.run(["which", "qpdf"], capture_output=True)
-        if result.returncode != 0:
+        # 檢查 qpdf 是否可用（直接查 PATH，不另外啟動 which 行程）
+        if shutil.which("qpdf") is None:
             logger.debug("qpdf 未安裝，跳過解鎖")
-            return pdf_bytes
-
-        # 建立暫存檔案
-        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as input_file:
-            input_file.write(pdf_bytes)
-            input_path = input_file.name
+            return pdf_path
 
-        output_path = input_path.replace(".pdf", "_unlocked.pdf")
+        # 建立輸出暫存檔案
+        fd, output_path = tempfile.mkstemp(suffix="_unlocked.pdf")
+        os.close(fd)
 
         # 執行 qpdf 解鎖
         result = subprocess.run(
-            ["qpdf", "--decrypt", input_path, output_path],
+            ["qpdf", "--decrypt", pdf_path, output_path],
             capture_output=True,
             timeout=30
         )
 
         if result.returncode == 0:
-            with open(output_path, "rb") as f:
-                unlocked_bytes = f.read()
             logger.info("成功移除 PDF 權限限制")
+            return output_path
 
-            # 清理暫存檔
-            import os
-            os.unlink(input_path)
-            os.unlink(output_path)
-
-            return unlocked_bytes
-        else:
-            logger.debug(f"qpdf 解鎖失敗: {result.stderr.decode()}")
-            import os
-            os.unlink(input_path)
-            return pdf_bytes
+        logger.debug("qpdf 解鎖失敗: %s", result.stderr.decode())
+        os.unlink(output_path)
+        return pdf_path
 
     except Exception as e:
-        logger.debug(f"PDF 解鎖過程發生錯誤: {e}")
-        return pdf_bytes
+        logger.debug("PDF 解鎖過程發生錯誤: %s", e)
+        return pdf_path
 
 
-async def extract_pdf_to_json(pdf_bytes: bytes) -> dict:
+async def extract_pdf_to_json(pdf_path: str, client: Optional[httpx.AsyncClient] = None) -> dict:
     """
     主要函式：將 PDF 轉換為結構化 JSON
 
     這是此模組的主要入口點。
 
     Args:
-        pdf_bytes: PDF 檔案的 bytes
+        pdf_path: PDF 檔案路徑
+        client: 共用的 HTTP client（由 app lifespan 建立）；未提供時建立臨時 client
 
     Returns:
         結構化的 JSON 字典，包含：
@@ -499,33 +596,30 @@ async def extract_pdf_to_json(pdf_bytes: bytes) -> dict:
         AdobeExtractError: 當 Extract 過程發生錯誤時
 
     Usage:
-        >>> pdf_content = open("report.pdf", "rb").read()
-        >>> result = await extract_pdf_to_json(pdf_content)
+        >>> result = await extract_pdf_to_json("report.pdf")
         >>> print(result["raw_text"][:500])
     """
+    if client is None:
+        async with create_adobe_client() as own_client:
+            return await extract_pdf_to_json(pdf_path, own_client)
+
     logger.info("開始 PDF Extract 流程...")
 
-    # 嘗試解鎖 PDF（移除權限限制）
-    pdf_bytes = _try_unlock_pdf(pdf_bytes)
+    # 先嘗試移除權限限制（qpdf 為同步子行程，移至執行緒池執行）
+    source_path = await asyncio.to_thread(_try_unlock_pdf, pdf_path)
 
     try:
         # 取得 access token
-        access_token = await _token_manager.get_access_token()
+        access_token = await _token_manager.get_access_token(client)
 
-        # 上傳 PDF 並建立作業
-        job_id = await _upload_pdf_and_create_job(pdf_bytes, access_token)
+        # 上傳 PDF 並建立作業（上傳時直接從檔案串流讀取）
+        job_id = await _upload_pdf_and_create_job(client, source_path, access_token)
 
         # 輪詢作業狀態
-        result_data = await _poll_job_status(job_id, access_token)
+        result_data = await _poll_job_status(client, job_id, access_token)
 
-        # 下載並解析結果
-        extracted_data = await _download_and_parse_result(result_data, access_token)
-
-        # 後處理：依頁分組元素
-        if extracted_data.get("structured_data"):
-            extracted_data["elements_by_page"] = _group_elements_by_page(
-                extracted_data["structured_data"]
-            )
+        # 下載並解析結果（含純文字與依頁分組元素）
+        extracted_data = await _download_and_parse_result(client, result_data, access_token)
 
         logger.info("PDF Extract 流程完成")
         return extracted_data
@@ -536,39 +630,13 @@ async def extract_pdf_to_json(pdf_bytes: bytes) -> dict:
         error_msg = f"PDF Extract 過程發生未預期錯誤: {str(e)}"
         logger.error(error_msg)
         raise AdobeExtractError(error_msg)
-
-
-def _group_elements_by_page(structured_data: dict) -> dict:
-    """
-    將 elements 依頁碼分組
-
-    Args:
-        structured_data: Adobe Extract 的原始結構化資料
-
-    Returns:
-        以頁碼為 key 的字典
-    """
-    pages = {}
-
-    elements = structured_data.get("elements", [])
-
-    for element in elements:
-        # Adobe Extract 的 element 通常有 Page 屬性
-        page_num = element.get("Page", 0)
-
-        if page_num not in pages:
-            pages[page_num] = {
-                "texts": [],
-                "tables": []
-            }
-
-        # 判斷是文字還是表格
-        if element.get("Table"):
-            pages[page_num]["tables"].append(element)
-        elif element.get("Text"):
-            pages[page_num]["texts"].append(element)
-
-    return pages
+    finally:
+        # 清理解鎖產生的暫存檔
+        if source_path != pdf_path:
+            try:
+                os.unlink(source_path)
+            except FileNotFoundError:
+                pass
 
 
 # ==============================================
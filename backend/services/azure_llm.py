@@ -16,21 +16,18 @@ import json
 import re
 import asyncio
 import threading
-from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Optional, List, Dict, Any, Tuple
-from openai import AzureOpenAI
+import httpx
+import orjson
+from openai import AsyncAzureOpenAI, DefaultAsyncHttpxClient
 from tenacity import retry, stop_after_attempt, wait_exponential, before_sleep_log, retry_if_exception_type
 from openai import RateLimitError, APITimeoutError, APIConnectionError
 import logging
 import time
 
-import sys
-import os
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from config import settings
-from schemas.report_schema import (
+from ..config import settings
+from ..schemas.report_schema import (
     ReportSchema,
     BasicInfo,
     TestItemParticulars,
@@ -42,7 +39,7 @@ from schemas.report_schema import (
     merge_schemas,
     create_empty_schema
 )
-from utils.logger import get_logger
+from ..utils.logger import get_logger
 
 logger = get_logger(__name__)
 
@@ -87,17 +84,35 @@ _token_tracker_lock = threading.Lock()
 # Azure OpenAI Client Setup
 # ==============================================
 
-def get_azure_client() -> AzureOpenAI:
+def get_azure_client(http_client: Optional[httpx.AsyncClient] = None) -> AsyncAzureOpenAI:
     """
-    建立 Azure OpenAI 客戶端
+    建立 Azure OpenAI 非同步客戶端
+
+    Args:
+        http_client: 底層 HTTP client（None 時由 SDK 自行建立）
 
     Returns:
-        AzureOpenAI client instance
+        AsyncAzureOpenAI client instance
     """
-    return AzureOpenAI(
+    return AsyncAzureOpenAI(
         api_key=settings.azure_openai_api_key,
         api_version=settings.azure_openai_api_version,
-        azure_endpoint=settings.azure_openai_endpoint
+        azure_endpoint=settings.azure_openai_endpoint,
+        http_client=http_client
+    )
+
+
+def create_azure_client() -> AsyncAzureOpenAI:
+    """
+    建立跨請求共用的 Azure OpenAI 客戶端
+
+    由 app lifespan 建立一次並重複使用，所有 chunk 與翻譯呼叫共用 keep-alive 連線，
+    避免每次呼叫重新進行 DNS 查詢與 TLS 交握；關閉時 await close()
+    """
+    return get_azure_client(
+        DefaultAsyncHttpxClient(
+            limits=httpx.Limits(max_keepalive_connections=32, keepalive_expiry=300)
+        )
     )
 
 
@@ -285,25 +300,30 @@ def _log_retry(retry_state):
     retry=retry_if_exception_type((RateLimitError, APITimeoutError, APIConnectionError)),
     before_sleep=_log_retry
 )
-def _call_llm(messages: List[Dict[str, str]], temperature: float = None) -> str:
+async def _call_llm(
+    messages: List[Dict[str, str]],
+    temperature: float = None,
+    *,
+    client: AsyncAzureOpenAI
+) -> str:
     """
     呼叫 Azure OpenAI LLM
 
     Args:
         messages: 訊息列表
         temperature: 溫度參數（預設使用 settings）
+        client: 共用的 AsyncAzureOpenAI client（由呼叫端建立並重複使用，不在每次呼叫時建立）
 
     Returns:
         LLM 回應的文字內容
     """
     global _token_tracker
-    client = get_azure_client()
 
     temp = temperature if temperature is not None else settings.llm_temperature
 
-    logger.debug(f"呼叫 LLM，deployment: {settings.azure_openai_deployment}")
+    logger.debug("呼叫 LLM，deployment: %s", settings.azure_openai_deployment)
 
-    response = client.chat.completions.create(
+    response = await client.chat.completions.create(
         model=settings.azure_openai_deployment,
         messages=messages,
         temperature=temp,
@@ -319,11 +339,75 @@ def _call_llm(messages: List[Dict[str, str]], temperature: float = None) -> str:
         )
 
     content = response.choices[0].message.content
-    logger.debug(f"LLM 回應長度: {len(content)} 字元")
+    logger.debug("LLM 回應長度: %s 字元", len(content))
 
     return content
 
 
+# LLM 回應解析用的正規表示式（模組載入時編譯一次）
+_MD_JSON_RE = re.compile(r'```(?:json)?\s*([\s\S]*?)\s*```')
+# 完整的雙引號 / 單引號字串（含跳脫字元）或單一大括號，用於線性掃描括號層級
+_JSON_BRACE_TOKEN_RE = re.compile(r'"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\'|[{}]', re.DOTALL)
+# JSON 修復時需處理的片段：雙引號字串（原樣保留）、單引號字串、} 或 ] 前多餘的逗號、Python 常值
+_JSON_REPAIR_TOKEN_RE = re.compile(
+    r'"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\'|,(?=\s*[}\]])|\b(?:True|False|None)\b',
+    re.DOTALL
+)
+_PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+
+def _repair_token(match: re.Match) -> str:
+    """_repair_json 的替換函式：依片段類型回傳修復後的內容"""
+    token = match.group()
+    first = token[0]
+    if first == '"':
+        return token
+    if first == "'":
+        # 單引號字串轉為雙引號字串（內部的雙引號需跳脫）
+        inner = token[1:-1].replace("\\'", "'").replace('\\"', '"').replace('"', '\\"')
+        return f'"{inner}"'
+    if first == ',':
+        return ''
+    return _PYTHON_LITERALS[token]
+
+
+def _repair_json(text: str) -> str:
+    """
+    單次掃描修復 LLM 常見的 JSON 格式問題
+
+    - 單引號字串改為雙引號（雙引號字串內的撇號不受影響）
+    - 移除 } 或 ] 前多餘的逗號
+    - 字串以外的 True / False / None 轉為 JSON 常值
+    """
+    return _JSON_REPAIR_TOKEN_RE.sub(_repair_token, text)
+
+
+def _scan_json_object(text: str) -> Optional[str]:
+    """
+    找出第一個括號平衡的 {...} 區塊
+
+    只掃描一次並略過字串（含單引號字串）內的大括號，避免以 rfind 取最後一個 } 時
+    誤將 JSON 之後的說明文字（例如範例）一併納入
+
+    Returns:
+        JSON 物件字串，找不到完整區塊時回傳 None
+    """
+    start = text.find('{')
+    if start == -1:
+        return None
+
+    depth = 0
+    for match in _JSON_BRACE_TOKEN_RE.finditer(text, start):
+        token = match.group()
+        if token == '{':
+            depth += 1
+        elif token == '}':
+            depth -= 1
+            if depth == 0:
+                return text[start:match.end()]
+    return None
+
+
 def _parse_llm_json_response(response_text: str, return_empty_on_fail: bool = False) -> dict:
     """
     解析 LLM 回傳的 JSON 字串
@@ -342,50 +426,48 @@ def _parse_llm_json_response(response_text: str, return_empty_on_fail: bool = Fa
     # 清理常見問題
     cleaned = response_text.strip()
 
-    # 嘗試直接解析
+    # 嘗試直接解析（orjson.JSONDecodeError 為 json.JSONDecodeError 的子類別）
     try:
-        return json.loads(cleaned)
+        return orjson.loads(cleaned)
     except json.JSONDecodeError as e:
-        logger.debug(f"直接解析失敗: {e}")
+        logger.debug("直接解析失敗: %s", e)
 
     # 嘗試提取 JSON 區塊（如果 LLM 加了 markdown 標記）
-    json_match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', cleaned)
+    json_match = _MD_JSON_RE.search(cleaned)
     if json_match:
         try:
-            return json.loads(json_match.group(1))
+            return orjson.loads(json_match.group(1))
         except json.JSONDecodeError as e:
-            logger.debug(f"從 markdown 區塊解析失敗: {e}")
-
-    # 嘗試找到第一個 { 和最後一個 }
+            logger.debug("從 markdown 區塊解析失敗: %s", e)
+
+    # 依序嘗試第一個完整的 {...} 區塊，以及第一個 { 到最後一個 } 的範圍
+    # （前者括號不平衡或解析失敗時，仍保有原本的 rfind 行為作為後備）
+    candidates = []
+    scanned = _scan_json_object(cleaned)
+    if scanned is not None:
+        candidates.append(scanned)
     start = cleaned.find('{')
     end = cleaned.rfind('}')
-    if start != -1 and end != -1 and end > start:
-        json_str = cleaned[start:end + 1]
+    if start != -1 and end > start:
+        widest = cleaned[start:end + 1]
+        if widest != scanned:
+            candidates.append(widest)
+
+    for json_str in candidates:
         try:
-            return json.loads(json_str)
+            return orjson.loads(json_str)
         except json.JSONDecodeError as e:
-            logger.debug(f"從括號範圍解析失敗: {e}")
+            logger.debug("從括號範圍解析失敗: %s", e)
 
-            # 嘗試修復常見的 JSON 問題
+            # 嘗試修復常見的 JSON 問題（單引號、多餘逗號、Python 常值）；
+            # 以標準 json 解析，保留對 NaN / Infinity 的寬鬆接受
             try:
-                # 移除尾部多餘的逗號
-                fixed = re.sub(r',\s*([}\]])', r'\1', json_str)
-                # 修復單引號
-                fixed = fixed.replace("'", '"')
-                return json.loads(fixed)
-            except json.JSONDecodeError:
-                pass
-
-            # 嘗試使用更寬鬆的解析
-            try:
-                import ast
-                # 將 null 轉為 None, true/false 轉為 True/False
-                fixed = json_str.replace('null', 'None').replace('true', 'True').replace('false', 'False')
-                result = ast.literal_eval(fixed)
+                result = json.loads(_repair_json(json_str))
                 if isinstance(result, dict):
                     return result
-            except (ValueError, SyntaxError):
-                pass
+                logger.debug("修復後解析結果非 dict: %s", type(result).__name__)
+            except json.JSONDecodeError as e:
+                logger.debug("修復後仍無法解析: %s", e)
 
     # 解析失敗
     logger.error(f"無法解析 LLM 回應為 JSON: {response_text[:500]}")
@@ -463,7 +545,12 @@ def _prepare_chunks(adobe_json: dict, pages_per_chunk: int = None) -> List[dict]
     return chunks
 
 
-def _process_chunk(chunk: dict, chunk_index: int, total_chunks: int) -> ReportSchema:
+async def _process_chunk(
+    chunk: dict,
+    chunk_index: int,
+    total_chunks: int,
+    client: AsyncAzureOpenAI
+) -> ReportSchema:
     """
     處理單一 chunk，呼叫 LLM 萃取資料
 
@@ -471,6 +558,7 @@ def _process_chunk(chunk: dict, chunk_index: int, total_chunks: int) -> ReportSc
         chunk: chunk 資料
         chunk_index: chunk 索引
         total_chunks: 總 chunk 數
+        client: 共用的 AsyncAzureOpenAI client
 
     Returns:
         從此 chunk 萃取的 ReportSchema
@@ -494,7 +582,7 @@ def _process_chunk(chunk: dict, chunk_index: int, total_chunks: int) -> ReportSc
     ]
 
     # 呼叫 LLM
-    response = _call_llm(messages)
+    response = await _call_llm(messages, client=client)
 
     # 解析回應
     try:
@@ -615,12 +703,13 @@ def _dict_to_schema(data: dict) -> ReportSchema:
 # Translation Functions
 # ==============================================
 
-def _translate_to_chinese(schema: ReportSchema) -> ReportSchema:
+async def _translate_to_chinese(schema: ReportSchema, client: AsyncAzureOpenAI) -> ReportSchema:
     """
     翻譯 schema 中的英文欄位為繁體中文
 
     Args:
         schema: 原始 schema
+        client: 共用的 AsyncAzureOpenAI client
 
     Returns:
         包含翻譯的 schema
@@ -665,10 +754,10 @@ def _translate_to_chinese(schema: ReportSchema) -> ReportSchema:
     ]
 
     try:
-        response = _call_llm(messages, temperature=0.3)
+        response = await _call_llm(messages, temperature=0.3, client=client)
 
         if response:
-            logger.debug(f"翻譯 LLM 回應長度: {len(response)}")
+            logger.debug("翻譯 LLM 回應長度: %s", len(response))
             # 使用 return_empty_on_fail=True 確保即使解析失敗也不會中斷
             translations = _parse_llm_json_response(response, return_empty_on_fail=True)
         else:
@@ -692,19 +781,20 @@ def _translate_to_chinese(schema: ReportSchema) -> ReportSchema:
 
     # 翻譯條文備註（也加上錯誤處理）
     try:
-        schema = _translate_clause_comments(schema)
+        schema = await _translate_clause_comments(schema, client=client)
     except Exception as e:
         logger.error(f"條文備註翻譯過程發生錯誤: {e}", exc_info=True)
 
     return schema
 
 
-def _translate_clause_comments(schema: ReportSchema) -> ReportSchema:
+async def _translate_clause_comments(schema: ReportSchema, client: AsyncAzureOpenAI) -> ReportSchema:
     """
     翻譯條文備註
 
     Args:
         schema: 原始 schema
+        client: 共用的 AsyncAzureOpenAI client
 
     Returns:
         包含翻譯備註的 schema
@@ -726,9 +816,16 @@ def _translate_clause_comments(schema: ReportSchema) -> ReportSchema:
 
     # 批次翻譯（避免太多 API 呼叫）
     batch_size = 10
-    for batch_start in range(0, len(comments_to_translate), batch_size):
-        batch = comments_to_translate[batch_start:batch_start + batch_size]
+    batches = [
+        comments_to_translate[batch_start:batch_start + batch_size]
+        for batch_start in range(0, len(comments_to_translate), batch_size)
+    ]
+
+    # 各批次彼此獨立，以 Semaphore 限制同時進行的呼叫數（上限同 chunk 並發數）
+    semaphore = asyncio.Semaphore(settings.llm_max_concurrent)
 
+    async def _translate_batch(batch: List[dict]) -> Dict[str, str]:
+        """翻譯單一批次，回傳 {條文編號: 中文翻譯}；失敗時回傳空 dict"""
         # 準備批次翻譯 prompt
         batch_content = "\n".join([
             f"[{item['clause']}] {item['comment_en']}"
@@ -740,30 +837,36 @@ def _translate_clause_comments(schema: ReportSchema) -> ReportSchema:
             {"role": "user", "content": batch_content}
         ]
 
+        translations_map = {}
         try:
-            response = _call_llm(messages, temperature=0.3)
+            async with semaphore:
+                response = await _call_llm(messages, temperature=0.3, client=client)
             # 使用 return_empty_on_fail=True 確保即使解析失敗也不會中斷
             result = _parse_llm_json_response(response, return_empty_on_fail=True)
 
             if not result:
                 logger.warning("條文備註翻譯結果為空，跳過此批次")
-                continue
+                return translations_map
 
-            # 更新翻譯
             translations_list = result.get("translations", [])
             if isinstance(translations_list, list):
-                translations_map = {}
                 for t in translations_list:
                     if isinstance(t, dict) and "clause" in t and "comment_zh" in t:
                         translations_map[t["clause"]] = t["comment_zh"]
 
-                for item in batch:
-                    if item["clause"] in translations_map:
-                        schema.clause_verdicts[item["index"]].comment_zh = translations_map[item["clause"]]
-
         except Exception as e:
             logger.error(f"翻譯條文備註時發生錯誤: {e}")
 
+        return translations_map
+
+    # 並發送出所有批次，不必逐批等待 LLM 回應
+    results = await asyncio.gather(*(_translate_batch(batch) for batch in batches))
+    for batch, translations_map in zip(batches, results):
+        # 更新翻譯
+        for item in batch:
+            if item["clause"] in translations_map:
+                schema.clause_verdicts[item["index"]].comment_zh = translations_map[item["clause"]]
+
     return schema
 
 
@@ -877,7 +980,8 @@ def _infer_checkbox_flags(schema: ReportSchema) -> ReportSchema:
 
 async def extract_report_schema_from_adobe_json(
     adobe_json: dict,
-    max_concurrent: int = None
+    max_concurrent: int = None,
+    client: Optional[AsyncAzureOpenAI] = None
 ) -> Tuple[ReportSchema, dict]:
     """
     主要函式：將 Adobe Extract 結果轉換為統一 Schema
@@ -894,12 +998,13 @@ async def extract_report_schema_from_adobe_json(
     Args:
         adobe_json: Adobe Extract 的結果（來自 adobe_extract.py）
         max_concurrent: 最大並發數（預設 5，避免 API rate limit）
+        client: 共用的 AsyncAzureOpenAI client（None 時於本次呼叫內建立一個，結束後關閉）
 
     Returns:
         Tuple[ReportSchema, dict]: (完整的 ReportSchema 物件, 統計資訊)
 
     Usage:
-        >>> adobe_result = await extract_pdf_to_json(pdf_bytes)
+        >>> adobe_result = await extract_pdf_to_json(pdf_path)
         >>> schema, stats = await extract_report_schema_from_adobe_json(adobe_result)
         >>> print(schema.basic_info.cb_report_no)
         >>> print(f"Token 使用量: {stats['total_tokens']}")
@@ -922,57 +1027,45 @@ async def extract_report_schema_from_adobe_json(
     chunks = _prepare_chunks(adobe_json)
     total_chunks = len(chunks)
 
-    # Step 2: 並發處理 chunks
-    merged_schema = create_empty_schema()
-
-    # 使用 ThreadPoolExecutor 進行並發處理（因為 _call_llm 是同步的）
-    loop = asyncio.get_event_loop()
-
-    # 分批處理以控制並發數
-    batch_count = 0
-    for batch_start in range(0, total_chunks, max_concurrent):
-        batch_end = min(batch_start + max_concurrent, total_chunks)
-        batch_chunks = chunks[batch_start:batch_end]
-        batch_count += 1
-
-        # 批次間延遲：從第二批開始，每批等待 2 秒以避免 rate limit
-        if batch_count > 1:
-            delay = 2  # 秒
-            logger.info(f"批次間延遲 {delay} 秒以避免 rate limit...")
-            await asyncio.sleep(delay)
-
-        logger.info(f"並發處理 chunks {batch_start + 1}-{batch_end}/{total_chunks} (batch {batch_count})")
-
-        # 使用 ThreadPoolExecutor 並發呼叫
-        with ThreadPoolExecutor(max_workers=max_concurrent) as executor:
-            futures = []
-            for i, chunk in enumerate(batch_chunks):
-                chunk_index = batch_start + i
-                future = loop.run_in_executor(
-                    executor,
-                    _process_chunk,
-                    chunk,
-                    chunk_index,
-                    total_chunks
-                )
-                futures.append(future)
-
-            # 等待所有 futures 完成
-            results = await asyncio.gather(*futures, return_exceptions=True)
-
-        # 合併結果
-        for i, result in enumerate(results):
-            chunk_index = batch_start + i
+    # 未傳入共用 client 時（例如 CLI / 同步包裝），本次呼叫內建立一個並於結束時關閉
+    owns_client = client is None
+    if owns_client:
+        client = create_azure_client()
+
+    try:
+        # Step 2: 並發處理 chunks
+        merged_schema = create_empty_schema()
+
+        # 以 Semaphore 限制同時進行的呼叫數，所有 chunks 一次排入：
+        # 任一呼叫完成即遞補下一個，不必等整批中最慢的 chunk 完成
+        semaphore = asyncio.Semaphore(max_concurrent)
+
+        logger.info(f"並發處理 {total_chunks} 個 chunks（最多同時 {max_concurrent} 個）")
+
+        async def _run_chunk(chunk: dict, chunk_index: int) -> ReportSchema:
+            async with semaphore:
+                return await _process_chunk(chunk, chunk_index, total_chunks, client)
+
+        results = await asyncio.gather(
+            *(_run_chunk(chunk, i) for i, chunk in enumerate(chunks)),
+            return_exceptions=True
+        )
+
+        # 依 chunk 順序合併結果
+        for chunk_index, result in enumerate(results):
             if isinstance(result, Exception):
                 logger.error(f"處理 chunk {chunk_index + 1} 時發生錯誤: {result}")
                 continue
             merged_schema = merge_schemas(merged_schema, result)
 
-    # Step 3: 推斷 checkbox flags
-    merged_schema = _infer_checkbox_flags(merged_schema)
+        # Step 3: 推斷 checkbox flags
+        merged_schema = _infer_checkbox_flags(merged_schema)
 
-    # Step 4: 翻譯成繁體中文
-    merged_schema = _translate_to_chinese(merged_schema)
+        # Step 4: 翻譯成繁體中文
+        merged_schema = await _translate_to_chinese(merged_schema, client)
+    finally:
+        if owns_client:
+            await client.close()
 
     # 設定 metadata
     merged_schema.extraction_timestamp = datetime.now().isoformat()
@@ -988,7 +1081,7 @@ async def extract_report_schema_from_adobe_json(
             "estimated_cost": _token_tracker.calculate_cost(),
             "total_chunks": total_chunks
         }
-        logger.debug(f"Token tracker 狀態: prompt={_token_tracker.total_prompt_tokens}, completion={_token_tracker.total_completion_tokens}, calls={_token_tracker.call_count}")
+        logger.debug("Token tracker 狀態: prompt=%s, completion=%s, calls=%s", _token_tracker.total_prompt_tokens, _token_tracker.total_completion_tokens, _token_tracker.call_count)
 
     logger.info("Report Schema 萃取完成")
     logger.info(f"  - 基本資料: {merged_schema.basic_info.cb_report_no}")
@@ -13,16 +13,12 @@ PyMuPDF PDF Extract Service
 """
 
 import fitz  # PyMuPDF
-import subprocess
-import tempfile
+import asyncio
+from concurrent.futures import Executor
 from typing import Optional
 from pathlib import Path
 
-import sys
-import os
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from utils.logger import get_logger
+from ..utils.logger import get_logger
 
 logger = get_logger(__name__)
 
@@ -32,65 +28,15 @@ class PyMuPDFExtractError(Exception):
     pass
 
 
-def _try_unlock_pdf(pdf_bytes: bytes) -> bytes:
-    """
-    嘗試使用 qpdf 移除 PDF 權限限制
-
-    Args:
-        pdf_bytes: 原始 PDF bytes
-
-    Returns:
-        解鎖後的 PDF bytes（如果成功），否則回傳原始 bytes
-    """
-    try:
-        # 檢查 qpdf 是否可用
-        result = subprocess.run(['which', 'qpdf'], capture_output=True)
-        if result.returncode != 0:
-            logger.debug("qpdf 未安裝，跳過解鎖步驟")
-            return pdf_bytes
-
-        # 建立暫存檔案
-        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as input_file:
-            input_file.write(pdf_bytes)
-            input_path = input_file.name
-
-        output_path = input_path.replace('.pdf', '_unlocked.pdf')
-
-        try:
-            # 執行 qpdf 解鎖
-            result = subprocess.run(
-                ['qpdf', '--decrypt', input_path, output_path],
-                capture_output=True,
-                timeout=30
-            )
-
-            if result.returncode == 0 and os.path.exists(output_path):
-                with open(output_path, 'rb') as f:
-                    unlocked_bytes = f.read()
-                logger.info("成功移除 PDF 權限限制")
-                return unlocked_bytes
-            else:
-                logger.debug(f"qpdf 執行失敗: {result.stderr.decode()}")
-                return pdf_bytes
-
-        finally:
-            # 清理暫存檔案
-            if os.path.exists(input_path):
-                os.unlink(input_path)
-            if os.path.exists(output_path):
-                os.unlink(output_path)
-
-    except Exception as e:
-        logger.debug(f"PDF 解鎖失敗: {e}")
-        return pdf_bytes
-
-
-def extract_pdf_with_pymupdf(pdf_bytes: bytes) -> dict:
+def extract_pdf_with_pymupdf(pdf_path: str) -> dict:
     """
     使用 PyMuPDF 擷取 PDF 內容
 
+    直接以檔案路徑開啟 PDF，由 MuPDF 自行讀取檔案，不需先載入整份 bytes；
+    MuPDF 擷取文字時不受權限限制（owner password）影響，無需先以 qpdf 解鎖
+
     Args:
-        pdf_bytes: PDF 檔案的 bytes
+        pdf_path: PDF 檔案路徑
 
     Returns:
         與 Adobe Extract 相容的 JSON 結構:
@@ -107,12 +53,9 @@ def extract_pdf_with_pymupdf(pdf_bytes: bytes) -> dict:
     """
     logger.info("開始使用 PyMuPDF 擷取 PDF...")
 
-    # 嘗試解鎖 PDF
-    pdf_bytes = _try_unlock_pdf(pdf_bytes)
-
     try:
         # 開啟 PDF
-        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+        doc = fitz.open(pdf_path, filetype="pdf")
     except Exception as e:
         raise PyMuPDFExtractError(f"無法開啟 PDF: {e}")
 
@@ -174,7 +117,7 @@ def extract_pdf_with_pymupdf(pdf_bytes: bytes) -> dict:
                         "content": table_text
                     })
         except Exception as e:
-            logger.debug(f"頁面 {page_num} 表格擷取失敗: {e}")
+            logger.debug("頁面 %s 表格擷取失敗: %s", page_num, e)
 
         elements_by_page[page_num] = {
             "texts": text_blocks,
@@ -202,17 +145,22 @@ def extract_pdf_with_pymupdf(pdf_bytes: bytes) -> dict:
     return result
 
 
-async def extract_pdf_to_json(pdf_bytes: bytes) -> dict:
+async def extract_pdf_to_json(pdf_path: str, executor: Optional[Executor] = None) -> dict:
     """
     非同步版本的 PDF 擷取（保持與 Adobe Extract 介面相容）
 
+    PyMuPDF 解析為同步阻塞操作，交由 executor 執行以免卡住 event loop；
+    傳入 ProcessPoolExecutor 時多份 PDF 可跨行程平行解析，不受 GIL 限制
+
     Args:
-        pdf_bytes: PDF 檔案的 bytes
+        pdf_path: PDF 檔案路徑
+        executor: 執行擷取的 executor，未提供時使用預設的執行緒池
 
     Returns:
         擷取結果的 dict
     """
-    return extract_pdf_with_pymupdf(pdf_bytes)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, extract_pdf_with_pymupdf, pdf_path)
 
 
 def create_mock_extract_result() -> dict:
@@ -244,15 +192,12 @@ if __name__ == "__main__":
     import sys
 
     if len(sys.argv) < 2:
-        print("Usage: python pymupdf_extract.py <pdf_file>")
+        print("Usage: python -m backend.services.pymupdf_extract <pdf_file>")
         sys.exit(1)
 
     pdf_path = sys.argv[1]
 
-    with open(pdf_path, "rb") as f:
-        pdf_bytes = f.read()
-
-    result = extract_pdf_with_pymupdf(pdf_bytes)
+    result = extract_pdf_with_pymupdf(pdf_path)
 
     print(f"總頁數: {result['metadata']['total_pages']}")
     print(f"文字區塊數: {sum(len(p['texts']) for p in result['elements_by_page'].values())}")
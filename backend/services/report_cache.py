@@ -0,0 +1,227 @@
+"""
+==============================================
+Report Cache Service
+以 PDF 內容雜湊快取已產生的 Word 報告
+==============================================
+
+此模組負責：
+1. 依 PDF 內容、模板與使用者輸入計算快取鍵
+2. 查詢 / 儲存已產生的 .docx 報告
+3. 查詢 / 儲存 LLM 萃取的 ReportSchema（僅依 PDF 內容，與使用者輸入無關）
+4. 依最近使用時間淘汰舊快取，控制磁碟使用量
+
+同一份 PDF 重複上傳時可直接回傳快取結果，略過 PDF 擷取與 LLM 翻譯；
+僅使用者輸入或模板不同時，仍可重用 Schema 快取，只需重新填寫模板
+"""
+
+import os
+import json
+import uuid
+import shutil
+import hashlib
+from typing import Dict, Optional, Tuple
+
+import orjson
+
+from ..config import settings
+from ..schemas.report_schema import ReportSchema
+from ..utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 快取目錄（位於暫存目錄下的子目錄，不受暫存檔定期清理影響）
+CACHE_DIR = str(settings.temp_path / "cache")
+CACHE_MAX_BYTES = settings.report_cache_max_mb * 1024 * 1024
+
+
+def is_cache_enabled() -> bool:
+    """快取上限設為 0 時停用快取"""
+    return CACHE_MAX_BYTES > 0
+
+
+def make_cache_key(pdf_digest: str, template_path: str, user_inputs: Dict[str, str]) -> str:
+    """
+    計算報告快取鍵
+
+    除 PDF 內容外，模板檔案（路徑與修改時間）、使用者輸入與擷取 / LLM 設定
+    皆會影響輸出結果，因此一併納入雜湊
+
+    Args:
+        pdf_digest: PDF 內容 SHA-256（hex）
+        template_path: 使用的 Word 模板路徑
+        user_inputs: 使用者輸入欄位
+
+    Returns:
+        快取鍵（hex 字串）
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(pdf_digest.encode("ascii"))
+    hasher.update(template_path.encode("utf-8"))
+    hasher.update(str(os.stat(template_path).st_mtime_ns).encode("ascii"))
+    hasher.update(settings.pdf_extractor.lower().encode("utf-8"))
+    hasher.update(settings.azure_openai_deployment.encode("utf-8"))
+    hasher.update(json.dumps(user_inputs, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    return hasher.hexdigest()
+
+
+def make_schema_cache_key(pdf_digest: str) -> str:
+    """
+    計算 Schema 快取鍵（PDF 內容與擷取 / LLM 設定）
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(pdf_digest.encode("ascii"))
+    hasher.update(settings.pdf_extractor.lower().encode("utf-8"))
+    hasher.update(settings.azure_openai_deployment.encode("utf-8"))
+    return hasher.hexdigest()
+
+
+def _cache_path(key: str) -> str:
+    return os.path.join(CACHE_DIR, f"{key}.docx")
+
+
+def _schema_cache_path(key: str) -> str:
+    return os.path.join(CACHE_DIR, f"{key}.schema.json")
+
+
+def get_cached_report(key: str) -> Optional[str]:
+    """
+    查詢快取的報告
+
+    命中時更新檔案修改時間，作為 LRU 淘汰依據
+
+    Returns:
+        快取檔案路徑，未命中時回傳 None
+    """
+    path = _cache_path(key)
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    return path
+
+
+def store_report(key: str, src_path: str) -> None:
+    """
+    將產生的報告存入快取
+
+    優先使用 hard link 避免複製檔案內容，跨檔案系統時改為複製；
+    先寫入暫存名稱再 rename，確保讀取端不會看到寫到一半的檔案
+
+    Args:
+        key: 快取鍵
+        src_path: 已產生的 .docx 路徑
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    dst_path = _cache_path(key)
+    tmp_path = f"{dst_path}.{uuid.uuid4().hex}.tmp"
+
+    try:
+        try:
+            os.link(src_path, tmp_path)
+        except OSError:
+            shutil.copyfile(src_path, tmp_path)
+        os.replace(tmp_path, dst_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+    evict_reports(CACHE_MAX_BYTES)
+
+
+def get_cached_schema(key: str) -> Optional[Tuple[ReportSchema, int]]:
+    """
+    查詢快取的 ReportSchema
+
+    Returns:
+        (ReportSchema, PDF 頁數)，未命中或內容損毀時回傳 None
+    """
+    path = _schema_cache_path(key)
+    try:
+        with open(path, "rb") as f:
+            data = orjson.loads(f.read())
+        schema = ReportSchema.model_validate(data["schema"])
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning("Schema 快取內容無效，忽略: %s", e)
+        return None
+
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass
+    return schema, data.get("pdf_pages", 0)
+
+
+def store_schema(key: str, schema: ReportSchema, pdf_pages: int) -> None:
+    """
+    將 LLM 萃取的 ReportSchema 存入快取
+
+    Args:
+        key: Schema 快取鍵
+        schema: 萃取結果
+        pdf_pages: PDF 頁數
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    dst_path = _schema_cache_path(key)
+    tmp_path = f"{dst_path}.{uuid.uuid4().hex}.tmp"
+
+    try:
+        # Schema 由 pydantic-core 直接序列化為 JSON bytes，不經過中介 dict 與 stdlib json；
+        # 頁數未知（None）時記為 0，與讀取時的預設值一致
+        with open(tmp_path, "wb") as f:
+            f.write(b'{"pdf_pages":%d,"schema":%s}' % (int(pdf_pages or 0), schema.model_dump_json().encode("utf-8")))
+        os.replace(tmp_path, dst_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+    evict_reports(CACHE_MAX_BYTES)
+
+
+def evict_reports(max_bytes: int) -> int:
+    """
+    依最近使用時間淘汰快取，直到總大小不超過上限
+
+    Args:
+        max_bytes: 快取總大小上限
+
+    Returns:
+        刪除的檔案數量
+    """
+    entries = []
+    total = 0
+    with os.scandir(CACHE_DIR) as it:
+        for entry in it:
+            if not entry.name.endswith((".docx", ".schema.json")):
+                continue
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, entry.path))
+            total += st.st_size
+
+    if total <= max_bytes:
+        return 0
+
+    removed = 0
+    entries.sort()
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+
+    logger.info("報告快取已淘汰 %d 個檔案", removed)
+    return removed
@@ -21,23 +21,18 @@ Word Template Filler Service
 
 import re
 import os
-import glob
 import zipfile
-import shutil
-import tempfile
-from typing import Dict, Any, List, Optional, Tuple
+from functools import lru_cache
+from typing import Callable, Dict, Any, List, Optional, Tuple
 from copy import deepcopy
 from docx import Document
 from docx.table import Table, _Cell
 from docx.text.paragraph import Paragraph
 from docx.text.run import Run
 
-import sys
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from schemas.report_schema import ReportSchema, BasicInfo
-from config import settings
-from utils.logger import get_logger
+from ..schemas.report_schema import ReportSchema, BasicInfo
+from ..config import settings
+from ..utils.logger import get_logger
 
 logger = get_logger(__name__)
 
@@ -50,6 +45,9 @@ logger = get_logger(__name__)
 PLACEHOLDER_PATTERN = re.compile(r'\{\{([^}]+)\}\}')
 PLACEHOLDER_REGEX_RAW = re.compile(r'\{\{.*?\}\}')
 
+# 需要處理文字的 docx XML part（本文、頁首、頁尾）
+DOCX_TEXT_PART_REGEX = re.compile(r'^word/(document|header[^/]*|footer[^/]*)\.xml$')
+
 # Checkbox 符號
 CHECKBOX_UNCHECKED = "□"
 CHECKBOX_CHECKED = "■"
@@ -483,7 +481,7 @@ def replace_placeholder_in_paragraph(paragraph: Paragraph, mapping: Dict[str, st
 
             if replace_text_in_runs(paragraph.runs, old_text, str(new_text)):
                 count += 1
-                logger.debug(f"替換 {old_text} → {new_text[:50]}...")
+                logger.debug("替換 %s → %s...", old_text, new_text[:50])
 
     return count
 
@@ -530,7 +528,7 @@ def replace_checkbox_in_paragraph(paragraph: Paragraph, checkbox_mapping: Dict[s
                 # 但要小心只改這個 label 相關的 □
                 if replace_text_in_runs(paragraph.runs, CHECKBOX_UNCHECKED, CHECKBOX_CHECKED):
                     count += 1
-                    logger.debug(f"勾選 checkbox: {label}")
+                    logger.debug("勾選 checkbox: %s", label)
                     break
 
     return count
@@ -876,6 +874,61 @@ def replace_placeholder_in_cell_text(cell: _Cell, key: str, value: str) -> int:
     return count
 
 
+def _is_text_part(name: str) -> bool:
+    """是否為需要處理文字的 XML part（本文、頁首、頁尾）"""
+    return DOCX_TEXT_PART_REGEX.match(name) is not None
+
+
+def rewrite_docx_parts(
+    docx_path: str,
+    transform: Callable[[str, str], str],
+    part_filter: Callable[[str], bool] = _is_text_part
+) -> bool:
+    """
+    以 zip-to-zip 方式改寫 docx 內的 XML part
+
+    直接在記憶體中讀取需要處理的 part，其餘 part 原樣複製到新的壓縮檔，
+    不必將整份 docx 解壓縮到暫存目錄再重新壓縮；內容未變動時不重寫檔案。
+
+    Args:
+        docx_path: .docx 檔案路徑
+        transform: (part 名稱, XML 文字) -> 新的 XML 文字
+        part_filter: 決定哪些 part 需要交給 transform 處理
+
+    Returns:
+        是否有任何 part 被修改
+    """
+    with zipfile.ZipFile(docx_path, 'r') as zin:
+        infos = zin.infolist()
+        changed_parts: Dict[str, bytes] = {}
+        for info in infos:
+            if not part_filter(info.filename):
+                continue
+            xml_text = zin.read(info).decode("utf-8")
+            new_text = transform(info.filename, xml_text)
+            if new_text != xml_text:
+                changed_parts[info.filename] = new_text.encode("utf-8")
+
+        if not changed_parts:
+            return False
+
+        temp_docx = docx_path + ".rewrite"
+        try:
+            with zipfile.ZipFile(temp_docx, 'w', zipfile.ZIP_DEFLATED) as zout:
+                for info in infos:
+                    data = changed_parts.get(info.filename)
+                    if data is None:
+                        data = zin.read(info)
+                    zout.writestr(info.filename, data)
+        except BaseException:
+            if os.path.exists(temp_docx):
+                os.unlink(temp_docx)
+            raise
+
+    os.replace(temp_docx, docx_path)
+    return True
+
+
 def replace_placeholders_in_textboxes(docx_path: str, mapping: Dict[str, str]) -> None:
     """
     直接修改 docx XML 以處理 python-docx 無法觸及的 textbox（w:txbxContent）。
@@ -884,45 +937,17 @@ def replace_placeholders_in_textboxes(docx_path: str, mapping: Dict[str, str]) -
     if not mapping:
         return
 
-    temp_dir = tempfile.mkdtemp()
-    try:
-        with zipfile.ZipFile(docx_path, 'r') as zip_ref:
-            zip_ref.extractall(temp_dir)
-
-        word_dir = os.path.join(temp_dir, "word")
-        targets = [os.path.join(word_dir, "document.xml")]
-        targets += glob.glob(os.path.join(word_dir, "header*.xml"))
-        targets += glob.glob(os.path.join(word_dir, "footer*.xml"))
+    def _replace(_name: str, xml_text: str) -> str:
+        for k, v in mapping.items():
+            placeholder = f"{{{{{k}}}}}"
+            if placeholder in xml_text:
+                xml_text = xml_text.replace(placeholder, v or "")
+        return xml_text
 
-        changed = False
-        for xml_file in targets:
-            if not os.path.exists(xml_file):
-                continue
-            with open(xml_file, "r", encoding="utf-8") as f:
-                xml_text = f.read()
-            original = xml_text
-            for k, v in mapping.items():
-                placeholder = f"{{{{{k}}}}}"
-                if placeholder in xml_text:
-                    xml_text = xml_text.replace(placeholder, v or "")
-            if xml_text != original:
-                with open(xml_file, "w", encoding="utf-8") as f:
-                    f.write(xml_text)
-                changed = True
-
-        if changed:
-            temp_docx = docx_path + ".txbx"
-            with zipfile.ZipFile(temp_docx, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for root, _, files in os.walk(temp_dir):
-                    for file in files:
-                        path = os.path.join(root, file)
-                        arcname = os.path.relpath(path, temp_dir)
-                        zipf.write(path, arcname)
-            shutil.move(temp_docx, docx_path)
+    try:
+        rewrite_docx_parts(docx_path, _replace)
     except Exception as e:
         logger.warning(f"Textbox placeholder replacement failed: {e}")
-    finally:
-        shutil.rmtree(temp_dir, ignore_errors=True)
 
 
 def cleanup_empty_value_sentences(docx_path: str) -> None:
@@ -955,61 +980,62 @@ def cleanup_empty_value_sentences(docx_path: str) -> None:
         (r'為([，,、。:：])', r'\1'),
     ]
 
-    temp_dir = tempfile.mkdtemp()
-    try:
-        with zipfile.ZipFile(docx_path, 'r') as zip_ref:
-            zip_ref.extractall(temp_dir)
+    total_cleanups = 0
 
-        word_dir = os.path.join(temp_dir, "word")
-        targets = [os.path.join(word_dir, "document.xml")]
-        targets += glob.glob(os.path.join(word_dir, "header*.xml"))
-        targets += glob.glob(os.path.join(word_dir, "footer*.xml"))
+    def _cleanup(_name: str, xml_text: str) -> str:
+        nonlocal total_cleanups
 
-        changed = False
-        total_cleanups = 0
+        # 先做簡單字串替換
+        for pattern, replacement in simple_patterns:
+            if pattern in xml_text:
+                count = xml_text.count(pattern)
+                xml_text = xml_text.replace(pattern, replacement)
+                total_cleanups += count
 
-        for xml_file in targets:
-            if not os.path.exists(xml_file):
-                continue
-            with open(xml_file, "r", encoding="utf-8") as f:
-                xml_text = f.read()
-            original = xml_text
-
-            # 先做簡單字串替換
-            for pattern, replacement in simple_patterns:
-                if pattern in xml_text:
-                    count = xml_text.count(pattern)
-                    xml_text = xml_text.replace(pattern, replacement)
-                    total_cleanups += count
-
-            # 再做正則替換（處理跨標籤的情況）
-            for regex_pattern, replacement in regex_patterns:
-                new_text, count = re.subn(regex_pattern, replacement, xml_text)
-                if count > 0:
-                    xml_text = new_text
-                    total_cleanups += count
-
-            if xml_text != original:
-                with open(xml_file, "w", encoding="utf-8") as f:
-                    f.write(xml_text)
-                changed = True
-
-        if changed:
+        # 再做正則替換（處理跨標籤的情況）
+        for regex_pattern, replacement in regex_patterns:
+            new_text, count = re.subn(regex_pattern, replacement, xml_text)
+            if count > 0:
+                xml_text = new_text
+                total_cleanups += count
+
+        return xml_text
+
+    try:
+        if rewrite_docx_parts(docx_path, _cleanup):
             logger.info(f"清理空值斷句: 共修正 {total_cleanups} 處")
-            temp_docx = docx_path + ".cleanup"
-            with zipfile.ZipFile(temp_docx, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for root, _, files in os.walk(temp_dir):
-                    for file in files:
-                        path = os.path.join(root, file)
-                        arcname = os.path.relpath(path, temp_dir)
-                        zipf.write(path, arcname)
-            shutil.move(temp_docx, docx_path)
         else:
             logger.debug("清理空值斷句: 未發現需要清理的模式")
     except Exception as e:
         logger.warning(f"清理空值斷句失敗: {e}")
-    finally:
-        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+# ==============================================
+# Template Loading
+# ==============================================
+
+@lru_cache(maxsize=4)
+def _parse_template(template_path: str, mtime_ns: int) -> Document:
+    """解析模板（依路徑與修改時間快取；快取的物件不可直接修改）"""
+    logger.info("解析 Word 模板: %s", template_path)
+    return Document(template_path)
+
+
+def load_template_document(template_path: str) -> Document:
+    """
+    取得可供填寫的模板 Document
+
+    模板只在首次使用（或檔案更新）時解析一次，之後複製已解析的 XML 樹，
+    省去每次重新解壓縮與解析 XML
+
+    Args:
+        template_path: Word 模板檔案路徑
+
+    Returns:
+        模板的獨立副本（可直接修改）
+    """
+    base_doc = _parse_template(template_path, os.stat(template_path).st_mtime_ns)
+    return deepcopy(base_doc)
 
 
 # ==============================================
@@ -1020,7 +1046,8 @@ def fill_cns_template(
     schema: ReportSchema,
     template_path: str,
     output_path: str,
-    user_inputs: Optional[Dict[str, str]] = None
+    user_inputs: Optional[Dict[str, str]] = None,
+    template_doc: Optional[Document] = None
 ) -> None:
     """
     主要函式：填寫 CNS Word 模板
@@ -1041,6 +1068,7 @@ def fill_cns_template(
             - report_author: 報告撰寫人
             - report_signer: 報告簽署人
             - series_model: 系列型號（逗號分隔）
+        template_doc: 已載入的模板副本（選填，由 load_template_document 取得；會被直接修改）
 
     Raises:
         FileNotFoundError: 當模板檔案不存在時
@@ -1092,8 +1120,8 @@ def fill_cns_template(
             placeholder_mapping["series_model"] = user_inputs["series_model"]
             logger.info(f"使用者輸入 - 系列型號: {user_inputs['series_model']}")
 
-    # 載入模板
-    doc = Document(template_path)
+    # 載入模板（使用已解析模板的副本）
+    doc = template_doc if template_doc is not None else load_template_document(template_path)
 
     total_replacements = 0
 
@@ -1536,7 +1564,7 @@ def test_fill_with_mock_data(template_path: str, output_path: str) -> None:
         template_path: 模板路徑
         output_path: 輸出路徑
     """
-    from services.azure_llm import create_mock_schema
+    from .azure_llm import create_mock_schema
 
     schema = create_mock_schema()
     fill_cns_template(schema, template_path, output_path)
@@ -1788,7 +1816,7 @@ def update_formcheckbox_in_xml(
                     result = result[:cb_match.start() + offset] + new_cb + result[cb_match.end() + offset:]
                     offset += len(new_cb) - len(old_cb)
                     changes_made += 1
-                    logger.debug(f"FORMCHECKBOX - 勾選: {label}")
+                    logger.debug("FORMCHECKBOX - 勾選: %s", label)
 
             elif should_uncheck and is_currently_checked:
                 # 需要取消勾選：移除 <w:checked/>
@@ -1798,7 +1826,7 @@ def update_formcheckbox_in_xml(
                 result = result[:cb_match.start() + offset] + new_cb + result[cb_match.end() + offset:]
                 offset += len(new_cb) - len(old_cb)
                 changes_made += 1
-                logger.debug(f"FORMCHECKBOX - 取消勾選: {label}")
+                logger.debug("FORMCHECKBOX - 取消勾選: %s", label)
 
         return result
 
@@ -1825,56 +1853,23 @@ def update_formcheckbox_in_docx(
 
     .docx 檔案實際上是一個 ZIP 壓縮檔，包含多個 XML 檔案。
     此函式會：
-    1. 解壓縮 .docx
-    2. 修改 word/document.xml 中的 checkbox 狀態
-    3. 重新壓縮為 .docx
+    1. 從壓縮檔讀取 word/document.xml
+    2. 修改其中的 checkbox 狀態
+    3. 寫入新的壓縮檔（其餘 part 原樣複製）
 
     Args:
         docx_path: .docx 檔案路徑
         checkbox_flags: CheckboxFlags 物件
         test_item_particulars: TestItemParticulars 物件
     """
-    import tempfile
-
     logger.info(f"開始更新 FORMCHECKBOX: {docx_path}")
 
-    # 建立暫存目錄
-    temp_dir = tempfile.mkdtemp()
-
-    try:
-        # 解壓縮 .docx
-        with zipfile.ZipFile(docx_path, 'r') as zip_ref:
-            zip_ref.extractall(temp_dir)
-
-        # 讀取 document.xml
-        doc_xml_path = os.path.join(temp_dir, 'word', 'document.xml')
-        with open(doc_xml_path, 'r', encoding='utf-8') as f:
-            xml_content = f.read()
-
-        # 更新 checkbox
-        new_xml_content = update_formcheckbox_in_xml(
-            xml_content, checkbox_flags, test_item_particulars
-        )
-
-        # 寫回 document.xml
-        with open(doc_xml_path, 'w', encoding='utf-8') as f:
-            f.write(new_xml_content)
-
-        # 重新壓縮為 .docx
-        # 注意：需要保持原始的壓縮結構
-        temp_docx = docx_path + '.tmp'
-        with zipfile.ZipFile(temp_docx, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for root, dirs, files in os.walk(temp_dir):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    arcname = os.path.relpath(file_path, temp_dir)
-                    zipf.write(file_path, arcname)
-
-        # 替換原檔案
-        shutil.move(temp_docx, docx_path)
-
-        logger.info(f"FORMCHECKBOX 更新完成: {docx_path}")
+    rewrite_docx_parts(
+        docx_path,
+        lambda _name, xml_text: update_formcheckbox_in_xml(
+            xml_text, checkbox_flags, test_item_particulars
+        ),
+        part_filter=lambda name: name == "word/document.xml"
+    )
 
-    finally:
-        # 清理暫存目錄
-        shutil.rmtree(temp_dir, ignore_errors=True)
+    logger.info(f"FORMCHECKBOX 更新完成: {docx_path}")
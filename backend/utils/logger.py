@@ -73,7 +73,7 @@ def get_logger(name: str) -> logging.Logger:
         logging.Logger 物件
 
     Usage:
-        >>> from utils.logger import get_logger
+        >>> from backend.utils.logger import get_logger
         >>> logger = get_logger(__name__)
         >>> logger.info("Hello, world!")
     """
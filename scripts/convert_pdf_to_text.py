@@ -8,10 +8,10 @@ import sys
 import os
 from pathlib import Path
 
-# 加入 backend 路徑以使用現有服務
-sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+# 加入專案根目錄以使用 backend 套件中的現有服務
+sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from services.adobe_extract import extract_pdf_to_json
+from backend.services.adobe_extract import extract_pdf_to_json
 
 
 PDF_PATH = Path("templates/CB MC-601.pdf")
@@ -28,11 +28,10 @@ async def main():
         sys.exit(1)
 
     print(f"正在讀取 PDF：{PDF_PATH}")
-    pdf_bytes = PDF_PATH.read_bytes()
-    print(f"PDF 大小：{len(pdf_bytes):,} bytes")
+    print(f"PDF 大小：{PDF_PATH.stat().st_size:,} bytes")
 
     print("正在呼叫 Adobe PDF Extract API...")
-    result = await extract_pdf_to_json(pdf_bytes)
+    result = await extract_pdf_to_json(str(PDF_PATH))
 
     # 提取純文字
     raw_text = result.get("raw_text", "")
@@ -6,7 +6,6 @@ from pathlib import Path
 
 # 專案根目錄
 ROOT = Path(__file__).parent.parent
-BACKEND = ROOT / "backend"
 ENV_FILE = ROOT / ".env"
 
 # 載入 .env
@@ -19,9 +18,9 @@ if ENV_FILE.exists():
                 os.environ[key] = val
     print(f"已載入環境變數：{ENV_FILE}")
 
-# 切換到 backend 目錄
-os.chdir(BACKEND)
-sys.path.insert(0, str(BACKEND))
+# 切換到專案根目錄，以 backend 套件方式載入應用程式
+os.chdir(ROOT)
+sys.path.insert(0, str(ROOT))
 
 # 啟動伺服器
 import uvicorn
@@ -29,9 +28,13 @@ import uvicorn
 port = int(os.environ.get("PORT", 8000))
 print(f"啟動伺服器 http://localhost:{port}")
 
+# uvloop / httptools 由 uvicorn[standard] 提供；多個 worker 讓 CPU 密集的模板填寫可平行處理
 uvicorn.run(
-    "main:app",
+    "backend.main:app",
     host="0.0.0.0",
     port=port,
-    reload=False
+    reload=False,
+    loop="uvloop",
+    http="httptools",
+    workers=int(os.environ.get("WEB_CONCURRENCY", 1))
 )